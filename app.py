@@ -1,25 +1,306 @@
-from flask import Flask, render_template, request, jsonify
+import os
+from flask import Flask, Response, render_template, request, jsonify
+import cache
+import metrics
+import sessions
 import triangulation as tri
+import wire
+import workers
 
 app = Flask(__name__)
+# Responses are cached by a hash of the points and options. Set TRIANGULATION_CACHE_DIR
+# to also keep them on disk across restarts.
+result_cache = cache.ResultCache(
+    max_entries=int(os.environ.get('TRIANGULATION_CACHE_ENTRIES', 256)),
+    max_bytes=int(os.environ.get('TRIANGULATION_CACHE_BYTES', 64 * 1024 * 1024)),
+    directory=os.environ.get('TRIANGULATION_CACHE_DIR'))
+# Set TRIANGULATION_WORKERS to run triangulations in that many worker processes instead
+# of on the request thread. Requests beyond the workers and TRIANGULATION_QUEUE waiting
+# jobs get a 429, jobs running longer than TRIANGULATION_TIMEOUT seconds a 504.
+job_timeout = float(os.environ.get('TRIANGULATION_TIMEOUT', 60))
+worker_count = int(os.environ.get('TRIANGULATION_WORKERS', 0))
+pool = None
+if worker_count > 0:
+    queued = os.environ.get('TRIANGULATION_QUEUE')
+    pool = workers.TriangulationPool(worker_count, None if queued is None else int(queued), job_timeout)
+# Interactive sessions are kept in this process for TRIANGULATION_SESSION_TTL seconds
+session_store = sessions.SessionStore(
+    ttl=float(os.environ.get('TRIANGULATION_SESSION_TTL', 600)),
+    max_sessions=int(os.environ.get('TRIANGULATION_SESSIONS', 1024)))
+# Totals of the metrics the jobs report, served at /metrics
+request_metrics = metrics.RequestMetrics()
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/get_drawing_sequence', methods=['POST'])
-def get_drawing_sequence():
-    data = request.get_json()  # Get JSON data from request
-    points = data['points']
+def format_points(data, key='points'):
+    points = data[key]
     formatted_points = []
     for i in points:
         formatted_points.append((i["x"],i["y"]))
-    triang = tri.Triangulation(formatted_points)
-    records = triang.incremental_delaunay()
-    drawing_sequence = []
-    for i in records:
-        drawing_sequence.append(triang.convert_record(i))
-    return jsonify(drawing_sequence)
+    return formatted_points
+
+def order_options(data):
+    """Insertion order options shared by the endpoints, see triangulation.insertion_order."""
+    order = data.get('order', 'input')
+    if order not in tri.INSERTION_ORDERS:
+        raise ValueError(f"Unknown insertion order: {order}")
+    seed = data.get('seed')
+    # JSON true and false would pass as ints, and numpy rejects negative seeds
+    if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool) or seed < 0):
+        raise ValueError(f"seed must be a non-negative integer, got {seed!r}")
+    return {"order": order, "seed": seed}
+
+def integer_option(data, key, default=None):
+    """data[key] as an int, or default if it is missing or null."""
+    value = data.get(key)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} must be an integer, got {value!r}") from None
+
+def recording_options(data):
+    """Options for the endpoints that return a drawing sequence."""
+    # "full" (default) sends a complete snapshot per step, "delta" only sends the changes
+    record_format = data.get('format', 'full')
+    if record_format not in ('full', 'delta'):
+        raise ValueError(f"Unknown format: {record_format}")
+    options = order_options(data)
+    options["record_format"] = record_format
+    options["keyframe_interval"] = integer_option(data, 'keyframe_interval', 50)
+    if options["keyframe_interval"] < 1:
+        raise ValueError("keyframe_interval must be at least 1")
+    # Level of detail: "insertion" sends one frame per inserted point and max_frames caps
+    # the number of frames; the changes and circles in between are merged into them
+    detail = data.get('detail', 'step')
+    if detail not in ('step', 'insertion'):
+        raise ValueError(f"Unknown detail: {detail}")
+    options["detail"] = detail
+    max_frames = integer_option(data, 'max_frames')
+    if max_frames is not None:
+        options["max_frames"] = max_frames
+        if max_frames < 2:
+            raise ValueError("max_frames must be at least 2")
+    return options
+
+@app.route('/get_drawing_sequence', methods=['POST'])
+def get_drawing_sequence():
+    data = request.get_json()  # Get JSON data from request
+    formatted_points = format_points(data)
+    try:
+        options = recording_options(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    # The compact binary encoding is opt-in through ?encoding=binary or the Accept header
+    binary = request.args.get('encoding') == 'binary' or request.accept_mimetypes.best == wire.CONTENT_TYPE
+    mimetype = wire.CONTENT_TYPE if binary else 'application/json'
+    endpoint = 'get_drawing_sequence.binary' if binary else 'get_drawing_sequence'
+    key = cache.cache_key(endpoint, formatted_points, options)
+    body = result_cache.get(key)
+    if body is not None:
+        return cached_response(body, mimetype)
+    body, job_metrics = run_job(workers.drawing_sequence_body, formatted_points, options, binary)
+    result_cache.put(key, body)
+    return computed_response(body, mimetype, endpoint, job_metrics)
+
+@app.route('/stream_drawing_sequence', methods=['POST'])
+def stream_drawing_sequence():
+    """Same request and steps as /get_drawing_sequence, streamed as newline-delimited JSON
+    while the triangulation runs instead of as one array at the end."""
+    data = request.get_json()
+    formatted_points = format_points(data)
+    try:
+        options = recording_options(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    key = cache.cache_key('stream_drawing_sequence', formatted_points, options)
+    body = result_cache.get(key)
+    if body is not None:
+        return cached_response(body, 'application/x-ndjson')
+    chunks = stream_job(workers.drawing_sequence_lines, formatted_points, options)
+
+    def generate():
+        # Keep a copy for the cache only while it still fits, so streaming stays bounded
+        kept = []
+        size = 0
+        try:
+            for chunk in chunks:
+                # The job's metrics come last; headers are already sent, so they are only added up
+                if isinstance(chunk, dict):
+                    request_metrics.observe('stream_drawing_sequence', chunk)
+                    continue
+                if kept is not None:
+                    kept.append(chunk)
+                    size += len(chunk)
+                    if size > result_cache.max_bytes:
+                        kept = None
+                yield chunk
+        finally:
+            # Closing the pool stream cancels the job if the client went away early
+            chunks.close()
+        if kept is not None:
+            result_cache.put(key, b"".join(kept))
+    response = Response(generate(), mimetype='application/x-ndjson')
+    response.headers['X-Cache'] = 'MISS'
+    return response
+
+@app.route('/triangulate', methods=['POST'])
+def triangulate():
+    """Returns only the final triangulation, without recording an animation."""
+    data = request.get_json()
+    formatted_points = format_points(data)
+    try:
+        options = order_options(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    key = cache.cache_key('triangulate', formatted_points, options)
+    body = result_cache.get(key)
+    if body is not None:
+        return cached_response(body, 'application/json')
+    body, job_metrics = run_job(workers.triangulation_body, formatted_points, options)
+    result_cache.put(key, body)
+    return computed_response(body, 'application/json', 'triangulate', job_metrics)
+
+@app.route('/sessions', methods=['POST'])
+def create_session():
+    """Starts a session for a canvas. Send bounds as [min_x, min_y, max_x, max_y] or
+    width and height for [0, 0, width, height]; points may be added right away."""
+    data = request.get_json()
+    try:
+        if 'bounds' in data:
+            bounds = tuple(float(i) for i in data['bounds'])
+        else:
+            bounds = (0.0, 0.0, float(data['width']), float(data['height']))
+        record_format = data.get('format', 'delta')
+        if record_format not in ('full', 'delta'):
+            raise ValueError(f"Unknown format: {record_format}")
+        session_id, steps = session_store.create(bounds, record_format, integer_option(data, 'keyframe_interval', 50))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    session = session_store.get(session_id)
+    if data.get('points'):
+        try:
+            steps += session.insert(format_points(data))
+        except ValueError as e:
+            session_store.delete(session_id)
+            return jsonify({"error": str(e)}), 400
+    return jsonify({"session": session_id, "steps": [session.triangulation.convert_record(i) for i in steps]})
+
+@app.route('/sessions/<session_id>/insert', methods=['POST'])
+def session_insert(session_id):
+    """Adds points to a session and returns only the steps of that change."""
+    session = session_store.get(session_id)
+    try:
+        steps = session.insert(format_points(request.get_json()))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"steps": [session.triangulation.convert_record(i) for i in steps]})
+
+@app.route('/sessions/<session_id>/remove', methods=['POST'])
+def session_remove(session_id):
+    """Removes points from a session and returns only the steps of that change."""
+    session = session_store.get(session_id)
+    try:
+        steps = session.remove(format_points(request.get_json()))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"steps": [session.triangulation.convert_record(i) for i in steps]})
+
+@app.route('/sessions/<session_id>', methods=['DELETE'])
+def delete_session(session_id):
+    session_store.delete(session_id)
+    return '', 204
+
+@app.route('/query', methods=['POST'])
+def query_sites():
+    """Nearest site and containing triangle of every point in queries, and the bounded
+    Voronoi cells if voronoi is set. The sites are the points of the request, or the
+    current points of a session if session is given instead."""
+    data = request.get_json()
+    try:
+        queries = format_points(data, 'queries')
+    except (KeyError, TypeError):
+        return jsonify({"error": "queries must be a list of points"}), 400
+    voronoi = bool(data.get('voronoi', False))
+    if 'session' in data:
+        return jsonify(session_store.get(data['session']).query(queries, voronoi))
+    formatted_points = format_points(data)
+    try:
+        options = order_options(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    key = cache.cache_key('query', formatted_points, dict(options, queries=queries, voronoi=voronoi))
+    body = result_cache.get(key)
+    if body is not None:
+        return cached_response(body, 'application/json')
+    body, job_metrics = run_job(workers.query_body, formatted_points, queries, options, voronoi)
+    result_cache.put(key, body)
+    return computed_response(body, 'application/json', 'query', job_metrics)
+
+@app.errorhandler(sessions.SessionNotFound)
+def session_not_found(e):
+    return jsonify({"error": "Unknown or expired session"}), 404
+
+def run_job(job, *args):
+    """Runs job(*args) in the worker pool if there is one, otherwise on this thread."""
+    if pool is not None:
+        return pool.run(job, *args)
+    return workers.run_inline(job, args, job_timeout)
+
+def stream_job(job, *args):
+    if pool is not None:
+        return pool.stream(job, *args)
+    return workers.stream_inline(job, args, job_timeout)
+
+@app.errorhandler(workers.PoolSaturated)
+def pool_saturated(e):
+    response = jsonify({"error": "Server is busy, try again shortly"})
+    response.status_code = 429
+    response.headers['Retry-After'] = '1'
+    return response
+
+@app.errorhandler(workers.JobTimeout)
+def job_timed_out(e):
+    return jsonify({"error": f"Triangulation took longer than {job_timeout} seconds"}), 504
+
+def cached_response(body, mimetype):
+    response = Response(body, mimetype=mimetype)
+    response.headers['X-Cache'] = 'HIT'
+    return response
+
+def computed_response(body, mimetype, endpoint, job_metrics):
+    """Response for a body computed by a job, with the job's metrics as headers."""
+    request_metrics.observe(endpoint, job_metrics)
+    response = Response(body, mimetype=mimetype)
+    response.headers['X-Cache'] = 'MISS'
+    if job_metrics is not None:
+        response.headers.update(metrics.headers(job_metrics))
+    return response
+
+@app.route('/cache_stats')
+def cache_stats():
+    """Hit, miss and eviction counters of the result cache."""
+    return jsonify(result_cache.stats())
+
+@app.route('/session_stats')
+def session_stats():
+    """Number of live sessions and how many were created, expired and evicted."""
+    return jsonify(session_store.stats())
+
+@app.route('/pool_stats')
+def pool_stats():
+    """Counters of the worker pool, empty when triangulations run inline."""
+    return jsonify(pool.stats() if pool is not None else {})
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Totals of the job metrics and the cache, pool and session stats for Prometheus."""
+    text = request_metrics.render(result_cache.stats(), pool.stats() if pool is not None else None,
+                                  session_store.stats())
+    return Response(text, mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,2 @@
+'''Benchmarks for the triangulation code. Run them from the repository root, e.g.
+python -m benchmarks.bench_recording'''
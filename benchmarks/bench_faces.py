@@ -0,0 +1,50 @@
+'''Scaling benchmark for the face registry. Runs the headless triangulation on uniform
+inputs of growing size and counts face insertions, removals and membership checks.
+With constant-time registry operations both the operations per point and the time per
+operation stay roughly flat as the input grows.
+
+    python -m benchmarks.bench_faces --sizes 1000 10000 100000
+'''
+import argparse
+import time
+
+import triangulation as tri
+from benchmarks import datasets
+
+
+class CountingFaceRegistry(tri.Registry):
+    def __init__(self):
+        super().__init__()
+        self.operations = 0
+
+    def append(self, face):
+        self.operations += 1
+        super().append(face)
+
+    def remove(self, face):
+        self.operations += 1
+        super().remove(face)
+
+    def __contains__(self, face):
+        self.operations += 1
+        return super().__contains__(face)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'points':>8} {'face ops':>10} {'ops/point':>10} {'seconds':>9} {'us/point':>9}")
+    for n in args.sizes:
+        triang = tri.Triangulation(datasets.uniform(n, width=n, height=n), record=False)
+        triang.faces = CountingFaceRegistry()
+        start = time.perf_counter()
+        triang.incremental_delaunay()
+        elapsed = time.perf_counter() - start
+        ops = triang.faces.operations
+        print(f"{n:>8} {ops:>10} {ops / n:>10.2f} {elapsed:>9.2f} {elapsed / n * 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
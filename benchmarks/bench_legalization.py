@@ -0,0 +1,37 @@
+'''Compares the iterative (stack-based, edges opposite the new point only) and recursive
+legalization engines using the per-insertion flip and in-circle test counts recorded in
+Triangulation.insertion_stats.
+
+    python -m benchmarks.bench_legalization --points 5000
+'''
+import argparse
+import time
+
+import triangulation as tri
+from benchmarks import datasets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=5000)
+    parser.add_argument("--datasets", nargs="+", default=["uniform", "clustered", "circle"])
+    parser.add_argument("--order", choices=tri.INSERTION_ORDERS, default="random")
+    args = parser.parse_args()
+
+    print(f"{'dataset':>10} {'engine':>10} {'seconds':>8} {'flips/ins':>10} {'tests/ins':>10} {'max tests':>10}")
+    for name in args.datasets:
+        points = datasets.DATASETS[name](args.points)
+        for legalization in ("iterative", "recursive"):
+            triang = tri.Triangulation(points, record=False, order=args.order, seed=0, legalization=legalization)
+            start = time.perf_counter()
+            triang.incremental_delaunay()
+            elapsed = time.perf_counter() - start
+            stats = triang.insertion_stats
+            flips = sum(i[0] for i in stats) / len(stats)
+            tests = sum(i[1] for i in stats) / len(stats)
+            worst = max(i[1] for i in stats)
+            print(f"{name:>10} {legalization:>10} {elapsed:>8.2f} {flips:>10.2f} {tests:>10.2f} {worst:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+'''Compares the point location strategies on uniform and clustered inputs. Reports the
+headless run time, the peak memory traced by tracemalloc in a second run and the faces
+visited per point by the walking strategies.
+
+    python -m benchmarks.bench_location --sizes 10000 100000
+
+"buckets" pays for rewriting the buckets on every split and flip and for the bucket
+arrays themselves; "walk" needs no extra memory but its walks grow with the distance
+between consecutive points, so it only pays off with the brio order; "jump" keeps a
+pyramid of grids of recently inserted vertices so its walks stay short in any order.
+
+For 20k uniform points this measured 5.4 s (buckets), 9.9 s (walk) and 2.4 s (jump)
+in random order and 3.6 s, 2.1 s and 2.4 s in brio order. The peak memory of the three
+strategies is within 2% because the peak is reached by the finished DCEL, after most
+buckets have been emptied.
+'''
+import argparse
+import gc
+import time
+import tracemalloc
+
+import triangulation as tri
+from benchmarks import datasets
+
+
+def measure(points, location, order, seed):
+    """Times an untraced run, then repeats it under tracemalloc for the peak memory."""
+    gc.collect()
+    start = time.perf_counter()
+    triang = tri.Triangulation(points, record=False, order=order, seed=seed, location=location)
+    triang.incremental_delaunay()
+    elapsed = time.perf_counter() - start
+    steps = triang.walk_steps
+    del triang
+    gc.collect()
+    tracemalloc.start()
+    tri.Triangulation(points, record=False, order=order, seed=seed, location=location).incremental_delaunay()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--datasets", nargs="+", default=["uniform", "clustered"])
+    parser.add_argument("--orders", nargs="+", default=["random", "brio"])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'dataset':>10} {'order':>7} {'location':>8} {'points':>7} {'seconds':>8} {'peak bytes/point':>17} {'faces/walk':>11}")
+    for name in args.datasets:
+        for n in args.sizes:
+            points = datasets.DATASETS[name](n)
+            n = len(points)
+            for order in args.orders:
+                for location in tri.LOCATION_STRATEGIES:
+                    elapsed, peak, steps = measure(points, location, order, args.seed)
+                    print(f"{name:>10} {order:>7} {location:>8} {n:>7} {elapsed:>8.2f} {peak / n:>17.0f} {steps / n:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
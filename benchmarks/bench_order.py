@@ -0,0 +1,35 @@
+'''Compares insertion orders on sorted, gridded and clustered inputs. Reports time and
+in-circle tests per point; with the random and brio orders both should grow at most
+logarithmically with the input size, while the input order degrades on sorted data.
+
+    python -m benchmarks.bench_order --sizes 1000 4000 16000
+'''
+import argparse
+import time
+
+import triangulation as tri
+from benchmarks import datasets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 4000, 16000])
+    parser.add_argument("--datasets", nargs="+", default=["sorted", "grid", "clustered"])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'dataset':>10} {'order':>7} {'points':>7} {'seconds':>8} {'us/point':>9} {'tests/point':>12}")
+    for name in args.datasets:
+        for order in tri.INSERTION_ORDERS:
+            for n in args.sizes:
+                points = datasets.DATASETS[name](n)
+                triang = tri.Triangulation(points, record=False, order=order, seed=args.seed)
+                start = time.perf_counter()
+                triang.incremental_delaunay()
+                elapsed = time.perf_counter() - start
+                n = len(points)
+                print(f"{name:>10} {order:>7} {n:>7} {elapsed:>8.2f} {elapsed / n * 1e6:>9.1f} {triang.in_circle_count / n:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
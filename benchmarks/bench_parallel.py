@@ -0,0 +1,38 @@
+'''Compares the incremental engine with the strip-partitioned parallel engine
+(Triangulation.strip_delaunay) for several worker counts. The speedup needs as many
+free cores as workers.
+
+    python -m benchmarks.bench_parallel --points 200000 --workers 1 2 4 8
+'''
+import argparse
+import time
+
+import triangulation as tri
+from benchmarks import datasets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=200000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--dataset", choices=sorted(datasets.DATASETS), default="uniform")
+    args = parser.parse_args()
+
+    points = datasets.DATASETS[args.dataset](args.points)
+    start = time.perf_counter()
+    triang = tri.Triangulation(points, record=False, order="random", seed=0)
+    triang.incremental_delaunay()
+    baseline = time.perf_counter() - start
+    print(f"{len(points)} {args.dataset} points")
+    print(f"{'engine':>12} {'workers':>7} {'seconds':>8} {'speedup':>8} {'triangles':>10}")
+    print(f"{'incremental':>12} {1:>7} {baseline:>8.2f} {1:>8.2f} {len(triang.get_triangles()):>10}")
+    for workers in args.workers:
+        start = time.perf_counter()
+        triang = tri.Triangulation(points, record=False)
+        triang.strip_delaunay(workers=workers, strips=max(workers, 2))
+        elapsed = time.perf_counter() - start
+        print(f"{'strips':>12} {workers:>7} {elapsed:>8.2f} {baseline / elapsed:>8.2f} {len(triang.get_triangles()):>10}")
+
+
+if __name__ == "__main__":
+    main()
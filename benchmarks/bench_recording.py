@@ -0,0 +1,49 @@
+'''Measures the cost of Triangulation.update_plot as the number of recorded steps grows.
+The time per recorded step should stay flat: deduplication is a fingerprint lookup and
+the edges come from the incrementally maintained edge index. In the delta format the
+mean also includes the periodic keyframes, which are full snapshots and grow with the
+number of inserted points; the median is the cost of an ordinary step.
+
+    python -m benchmarks.bench_recording --points 3000 --window 2500
+'''
+import argparse
+import statistics
+import time
+
+import triangulation as tri
+from benchmarks import datasets
+
+
+class TimedTriangulation(tri.Triangulation):
+    """Triangulation that times every update_plot call."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.plot_times = []
+
+    def update_plot(self, circle=None, last=False):
+        start = time.perf_counter()
+        super().update_plot(circle, last)
+        self.plot_times.append(time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=3000)
+    parser.add_argument("--window", type=int, default=2500, help="update_plot calls per reported row")
+    parser.add_argument("--format", choices=["full", "delta"], default="delta")
+    args = parser.parse_args()
+
+    triang = TimedTriangulation(datasets.uniform(args.points), record_format=args.format)
+    triang.incremental_delaunay()
+    times = triang.plot_times
+    print(f"{args.points} points, {len(times)} update_plot calls, {len(triang.record)} recorded steps ({args.format})")
+    print(f"{'calls':>14} {'mean us':>10} {'median us':>10}")
+    for start in range(0, len(times), args.window):
+        window = times[start:start + args.window]
+        mean = sum(window) / len(window) * 1e6
+        median = statistics.median(window) * 1e6
+        print(f"{start:>6}-{start + len(window):<7} {mean:>10.2f} {median:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
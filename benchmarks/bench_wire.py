@@ -0,0 +1,41 @@
+'''Compares payload size and encode time of the JSON and binary drawing sequence
+encodings for both record formats.
+
+    python -m benchmarks.bench_wire --sizes 100 500 --formats delta
+'''
+import argparse
+import json
+import time
+
+import triangulation as tri
+import wire
+from benchmarks import datasets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500])
+    parser.add_argument("--formats", nargs="+", choices=["full", "delta"], default=["full", "delta"])
+    args = parser.parse_args()
+
+    print(f"{'points':>7} {'format':>6} {'steps':>7} {'json bytes':>12} {'binary bytes':>13} {'ratio':>6} {'json ms':>9} {'binary ms':>10}")
+    for n in args.sizes:
+        points = datasets.uniform(n)
+        for record_format in args.formats:
+            triang = tri.Triangulation(points, record_format=record_format)
+            records = triang.incremental_delaunay()
+
+            start = time.perf_counter()
+            text = json.dumps([triang.convert_record(i) for i in records]).encode()
+            json_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            binary = wire.encode_sequence(records)
+            binary_time = time.perf_counter() - start
+
+            print(f"{n:>7} {record_format:>6} {len(records):>7} {len(text):>12} {len(binary):>13} "
+                  f"{len(text) / len(binary):>6.1f} {json_time * 1000:>9.1f} {binary_time * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
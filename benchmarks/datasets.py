@@ -0,0 +1,48 @@
+'''Point set generators shared by the benchmarks. Every generator returns a list of
+unique (x, y) tuples rounded to two decimals like the points sent by the web client.'''
+import math
+import random
+
+
+def unique(points):
+    return list(dict.fromkeys(points))
+
+
+def uniform(n, seed=0, width=600, height=400):
+    rng = random.Random(seed)
+    return unique((round(rng.uniform(0, width), 2), round(rng.uniform(0, height), 2)) for _ in range(n))
+
+
+def clustered(n, seed=0, clusters=8, width=600, height=400):
+    """Gaussian clusters around randomly placed centres."""
+    rng = random.Random(seed)
+    centres = [(rng.uniform(0, width), rng.uniform(0, height)) for _ in range(clusters)]
+    spread = min(width, height) / 20
+    points = []
+    for i in range(n):
+        cx, cy = centres[i % clusters]
+        points.append((round(rng.gauss(cx, spread), 2), round(rng.gauss(cy, spread), 2)))
+    return unique(points)
+
+
+def grid(n, spacing=1.0):
+    side = math.ceil(math.sqrt(n))
+    return [(round(i * spacing, 2), round(j * spacing, 2)) for i in range(side) for j in range(side)][:n]
+
+
+def circle(n, radius=200.0):
+    return unique((round(radius * math.cos(2 * math.pi * i / n), 2), round(radius * math.sin(2 * math.pi * i / n), 2)) for i in range(n))
+
+
+def sorted_uniform(n, seed=0):
+    """Uniform points sorted by x, the order our UI exports use."""
+    return sorted(uniform(n, seed))
+
+
+DATASETS = {
+    "uniform": uniform,
+    "clustered": clustered,
+    "grid": grid,
+    "circle": circle,
+    "sorted": sorted_uniform,
+}
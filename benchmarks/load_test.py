@@ -0,0 +1,66 @@
+'''Load test for the worker pool. Sends concurrent /triangulate requests through the Flask
+test client for several worker counts and reports throughput and how many requests were
+rejected with 429. Every request uses a different point set so the result cache never hits.
+
+    python -m benchmarks.load_test --workers 0 1 2 4 --requests 32 --concurrency 8
+'''
+import argparse
+import threading
+import time
+
+import app as webapp
+import cache
+import workers
+from benchmarks import datasets
+
+
+def run(requests, concurrency, points, seed_base):
+    client = webapp.app.test_client()
+    statuses = []
+    lock = threading.Lock()
+    next_request = iter(range(requests))
+
+    def worker():
+        while True:
+            with lock:
+                i = next(next_request, None)
+            if i is None:
+                return
+            body = {"points": [{"x": x, "y": y} for x, y in datasets.uniform(points, seed=seed_base + i)]}
+            status = client.post("/triangulate", json=body).status_code
+            with lock:
+                statuses.append(status)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4], help="0 runs inline on the request threads")
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--points", type=int, default=3000)
+    parser.add_argument("--queue", type=int, default=None, help="waiting jobs allowed per pool, default 2 per worker")
+    args = parser.parse_args()
+
+    webapp.result_cache = cache.ResultCache(max_entries=0)
+    print(f"{'workers':>7} {'seconds':>8} {'req/s':>7} {'ok':>4} {'429':>4}")
+    for count, worker_count in enumerate(args.workers):
+        webapp.pool = workers.TriangulationPool(worker_count, args.queue, webapp.job_timeout) if worker_count > 0 else None
+        try:
+            elapsed, statuses = run(args.requests, args.concurrency, args.points, count * args.requests)
+        finally:
+            if webapp.pool is not None:
+                webapp.pool.shutdown()
+        ok = statuses.count(200)
+        print(f"{worker_count:>7} {elapsed:>8.2f} {ok / elapsed:>7.2f} {ok:>4} {statuses.count(429):>4}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+'''Stress checks for degenerate inputs: cocircular and collinear point sets that break
+plain floating-point predicates. Every configuration must finish with a consistent DCEL
+in which every edge is locally Delaunay (checked with the exact predicates), no edge
+belongs to more than two triangles and every triangle has positive area. The strip
+engine (strip_delaunay) is checked as well, and so are the queries: the nearest sites
+against brute force for queries near the points and far outside them, and the Voronoi
+cells of all sites off the convex hull. Exits with status 1 if any check fails.
+
+    python -m benchmarks.stress --points 400
+'''
+import argparse
+import sys
+from collections import Counter
+
+import numpy as np
+
+import predicates
+import query
+import triangulation as tri
+from benchmarks import datasets
+
+
+def line(n):
+    return [(round(i * 0.37, 2), round(i * 0.74, 2)) for i in range(n)]
+
+
+def cocircular_grid(n):
+    """Integer grid whose unit squares all have four cocircular corners."""
+    return datasets.grid(n, spacing=1.0)
+
+
+def tiny_grid(n):
+    """Grid with spacings far below the two decimals the supertriangle used to round to."""
+    return [(x * 1e-4, y * 1e-4) for x, y in datasets.grid(n)]
+
+
+def concentric(n):
+    """Points on three circles around the same centre."""
+    return datasets.unique(point for radius in (50.0, 100.0, 200.0) for point in datasets.circle(n // 3, radius))
+
+
+CASES = {
+    "grid": cocircular_grid,
+    "tiny_grid": tiny_grid,
+    "circle": datasets.circle,
+    "concentric": concentric,
+    "line": line,
+    # Not degenerate, but the supertriangle displaces some of its hull edges, which the
+    # nearest-site queries must make up for
+    "clustered": datasets.clustered,
+}
+
+
+def problems(triang, points):
+    """Returns a list of what is wrong with the finished triangulation."""
+    found = []
+    # Overlapping triangles can still have consistent twins and Delaunay edges
+    faces_per_edge = Counter()
+    for face in triang.faces:
+        e = face.outer_component
+        for edge in (e, e.next, e.prev):
+            faces_per_edge[frozenset((edge.origin.id, edge.next.origin.id))] += 1
+    shared = sum(count > 2 for count in faces_per_edge.values())
+    if shared:
+        found.append(f"{shared} edges belong to more than two triangles")
+    vertices = {(v.x, v.y) for v in triang.vertices}
+    missing = [p for p in points if p not in vertices]
+    if missing:
+        found.append(f"{len(missing)} points missing, e.g. {missing[0]}")
+    for face in triang.faces:
+        e = face.outer_component
+        if e.next.next.next is not e or e.next.face is not face or e.prev.face is not face:
+            found.append(f"face {face.id} is not a closed triangle")
+            continue
+        if triang.orient(e.origin, e.next.origin, e.prev.origin) <= 0:
+            found.append(f"face {face.id} has no positive area")
+    for edge in triang.half_edges:
+        twin = edge.twin
+        if twin is None:
+            continue
+        if twin.twin is not edge or twin.origin is not edge.next.origin:
+            found.append(f"half-edge {edge.id} has an inconsistent twin")
+            continue
+        a, b, c, d = edge.origin, edge.next.origin, edge.prev.origin, twin.prev.origin
+        if predicates.incircle(a.x, a.y, b.x, b.y, c.x, c.y, d.x, d.y) > 0:
+            found.append(f"edge {(a.x, a.y)}-{(b.x, b.y)} is not locally Delaunay")
+    return found
+
+
+def query_problems(triang, points, n=500, seed=0):
+    """Returns a list of what the queries got wrong. The nearest sites are checked for
+    queries spread over the points and over a box ten times their size, the Voronoi
+    cells by the distances from their vertices to the sites."""
+    found = []
+    coords = np.array(points, dtype=float)
+    low, high = coords.min(axis=0), coords.max(axis=0)
+    size = np.maximum(high - low, 1.0)
+    rng = np.random.default_rng(seed)
+    queries = np.concatenate([rng.uniform(low, high, (n, 2)), rng.uniform(low - 5 * size, high + 5 * size, (n, 2))])
+    nearest = query.nearest_sites(triang, queries)
+    distances = ((queries[:, None, :] - coords[None, :, :]) ** 2).sum(axis=2)
+    wrong = np.flatnonzero(distances[np.arange(len(queries)), nearest] > distances.min(axis=1))
+    if len(wrong):
+        found.append(f"{len(wrong)} queries got a site that is not the nearest, e.g. {tuple(queries[wrong[0]].tolist())}")
+    cells = query.voronoi_cells(triang)
+    missing = [i for i in np.flatnonzero(~query.convex_hull(coords)).tolist() if i not in cells]
+    if missing:
+        found.append(f"{len(missing)} sites off the convex hull have no cell, e.g. {points[missing[0]]}")
+    for site, cell in cells.items():
+        # Every vertex of a cell is as close to its site as to any other site
+        distances = np.sqrt(((cell[:, None, :] - coords[None, :, :]) ** 2).sum(axis=2))
+        closest = distances.min(axis=1)
+        if np.any(distances[:, site] - closest > 1e-9 * (1 + closest)):
+            found.append(f"the cell of {points[site]} has a vertex closer to another site")
+            break
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=400)
+    parser.add_argument("--record-points", type=int, default=64,
+                        help="size of the recorded runs, which also compute every circle")
+    args = parser.parse_args()
+
+    failed = 0
+    print(f"{'case':>10} {'engine':>9} {'order':>7} {'location':>8} {'legalize':>9} {'record':>6} {'points':>6}  result")
+
+    def report(name, engine, order, location, legalization, record, points, run):
+        nonlocal failed
+        try:
+            triang = run()
+            found = problems(triang, points) + query_problems(triang, points)
+        except Exception as e:
+            found = [f"{type(e).__name__}: {e}"]
+        failed += bool(found)
+        result = "ok" if not found else f"{len(found)} problems, {found[0]}"
+        print(f"{name:>10} {engine:>9} {order:>7} {location:>8} {legalization:>9} {str(record):>6} {len(points):>6}  {result}")
+
+    def incremental(points, **options):
+        triang = tri.Triangulation(points, **options)
+        triang.incremental_delaunay()
+        return triang
+
+    def strips(points, count):
+        triang = tri.Triangulation(points, record=False)
+        triang.strip_delaunay(workers=1, strips=count)
+        return triang
+
+    for name, generate in CASES.items():
+        for order in tri.INSERTION_ORDERS:
+            for location in tri.LOCATION_STRATEGIES:
+                for legalization in ("iterative", "recursive"):
+                    for record in (False, True):
+                        points = generate(args.record_points if record else args.points)
+                        report(name, "increment", order, location, legalization, record, points,
+                               lambda: incremental(points, record=record, order=order, seed=1,
+                                                   location=location, legalization=legalization))
+        for count in (2, 5):
+            points = generate(args.points)
+            report(name, f"strips={count}", "-", "-", "-", False, points, lambda: strips(points, count))
+    print(f"{failed} failed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
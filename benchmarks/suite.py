@@ -0,0 +1,181 @@
+'''Benchmark suite over the standard datasets. Every run records the wall time, the peak
+memory traced by tracemalloc in a second run, the in-circle tests, flips and recorded
+steps, and the results are written as JSON so two commits can be compared.
+
+    python -m benchmarks.suite --sizes 1000 10000 100000 --output after.json
+    python -m benchmarks.suite --compare before.json after.json
+
+Recording is on by default and uses the delta format. Runs above --record-limit points
+are headless, since even delta recordings hold a keyframe of the whole state every
+keyframe_interval steps. With --profile cprofile (or pyinstrument, if installed) each
+run is profiled instead and the profile is written to --profile-dir.
+'''
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import triangulation as tri
+from benchmarks import datasets
+from benchmarks.stress import problems
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+
+
+def build(points, args, record):
+    return tri.Triangulation(points, record=record, record_format="delta", order=args.order, seed=args.seed,
+                             storage=args.storage, location=args.location, legalization=args.legalization)
+
+
+def run(triang):
+    """Runs the triangulation, counting the recorded steps without keeping them."""
+    steps = 0
+    for _ in triang.iter_delaunay():
+        steps += 1
+    return steps
+
+
+def measure(name, points, args):
+    record = len(points) <= args.record_limit
+    gc.collect()
+    triang = build(points, args, record)
+    start = time.perf_counter()
+    steps = run(triang)
+    elapsed = time.perf_counter() - start
+    result = {
+        "dataset": name,
+        "points": len(points),
+        "seconds": elapsed,
+        "in_circle_tests": triang.in_circle_count,
+        "flips": triang.flip_count,
+        "steps": steps if record else None,
+        "triangles": len(triang.get_triangles()),
+    }
+    if args.validate:
+        result["problems"] = len(problems(triang, points))
+    del triang
+    if args.memory:
+        gc.collect()
+        tracemalloc.start()
+        run(build(points, args, record))
+        result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def profile(name, points, args):
+    """Profiles one run and writes the profile to args.profile_dir."""
+    os.makedirs(args.profile_dir, exist_ok=True)
+    path = os.path.join(args.profile_dir, f"{name}-{len(points)}")
+    triang = build(points, args, len(points) <= args.record_limit)
+    if args.profile == "pyinstrument":
+        from pyinstrument import Profiler
+        profiler = Profiler()
+        profiler.start()
+        run(triang)
+        profiler.stop()
+        with open(path + ".html", "w") as f:
+            f.write(profiler.output_html())
+        print(f"wrote {path}.html")
+        return
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    profiler.runcall(run, triang)
+    profiler.dump_stats(path + ".prof")
+    print(f"wrote {path}.prof")
+    pstats.Stats(profiler).sort_stats("tottime").print_stats(15)
+
+
+def commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(before_path, after_path):
+    """Prints the ratio after/before of every metric of the runs in both files."""
+    with open(before_path) as f:
+        before = {(r["dataset"], r["points"]): r for r in json.load(f)["results"]}
+    with open(after_path) as f:
+        after = json.load(f)["results"]
+    metrics = ["seconds", "peak_bytes", "in_circle_tests", "flips", "steps"]
+    print(f"{'dataset':>10} {'points':>8} " + " ".join(f"{m:>15}" for m in metrics))
+    for result in after:
+        old = before.get((result["dataset"], result["points"]))
+        if old is None:
+            continue
+        ratios = []
+        for metric in metrics:
+            if old.get(metric) and result.get(metric) is not None:
+                ratios.append(f"{result[metric] / old[metric]:>15.3f}")
+            else:
+                ratios.append(f"{'-':>15}")
+        print(f"{result['dataset']:>10} {result['points']:>8} " + " ".join(ratios))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--datasets", nargs="+", choices=sorted(datasets.DATASETS), default=list(datasets.DATASETS))
+    parser.add_argument("--order", choices=tri.INSERTION_ORDERS, default="brio")
+    parser.add_argument("--location", choices=tri.LOCATION_STRATEGIES, default="buckets")
+    parser.add_argument("--storage", choices=sorted(tri.STORAGE_ENGINES), default="objects")
+    parser.add_argument("--legalization", choices=["iterative", "recursive"], default="iterative")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--record-limit", type=int, default=100000,
+                        help="largest input that is recorded, larger runs are headless")
+    parser.add_argument("--no-memory", dest="memory", action="store_false",
+                        help="skip the traced second run that measures peak memory")
+    parser.add_argument("--validate", action="store_true", help="count Delaunay and DCEL problems of every result")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"])
+    parser.add_argument("--profile-dir", default="profiles")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two JSON result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    if args.profile == "pyinstrument":
+        try:
+            import pyinstrument  # noqa: F401
+        except ImportError:
+            parser.error("--profile pyinstrument needs the pyinstrument package")
+
+    results = []
+    if not args.profile:
+        print(f"{'dataset':>10} {'points':>8} {'seconds':>8} {'peak MB':>8} {'tests':>10} {'flips':>9} {'steps':>9}")
+    for name in args.datasets:
+        for n in args.sizes:
+            points = datasets.DATASETS[name](n)
+            if args.profile:
+                profile(name, points, args)
+                continue
+            result = measure(name, points, args)
+            results.append(result)
+            peak = f"{result['peak_bytes'] / 2 ** 20:>8.1f}" if "peak_bytes" in result else f"{'-':>8}"
+            steps = result["steps"] if result["steps"] is not None else "-"
+            print(f"{name:>10} {result['points']:>8} {result['seconds']:>8.2f} {peak} "
+                  f"{result['in_circle_tests']:>10} {result['flips']:>9} {steps:>9}")
+    if args.output and results:
+        report = {
+            "commit": commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "options": {key: getattr(args, key) for key in ("order", "location", "storage", "legalization", "seed", "record_limit")},
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+'''Bulk triangulation of large point sets stored in binary files, for batch jobs that
+should not go through the JSON endpoints. Points are memory-mapped from .npy files or
+raw little-endian float64 x, y pairs, triangulated without recording and the mesh is
+written in the binary format below. See cli.py for the command line.
+
+Mesh layout:
+    header     magic b"DTMS", uint16 version, uint16 index size in bytes (4 or 8),
+               uint64 point count, uint64 triangle count, uint64 edge count
+    triangles  three point indices per triangle, counter-clockwise
+    edges      two point indices per edge
+
+Indices are rows of the input file (the first row for duplicated points) and are
+uint32 unless the input has 2**32 rows or more, then uint64. All values are
+little-endian, so the blocks can be memory-mapped as arrays again, see read_mesh.'''
+import struct
+
+import numpy as np
+
+import triangulation as tri
+
+MAGIC = b"DTMS"
+VERSION = 1
+
+HEADER = struct.Struct("<4sHHQQQ")
+
+
+def load_points(path):
+    """Memory-maps the points of path, an .npy file of shape (n, 2) or a raw file of
+    float64 x, y pairs. Nothing is read until the rows are used."""
+    if path.endswith(".npy"):
+        points = np.load(path, mmap_mode="r")
+        if points.ndim != 2 or points.shape[1] != 2:
+            raise ValueError(f"{path} holds an array of shape {points.shape}, expected (n, 2)")
+        return points
+    points = np.memmap(path, dtype="<f8", mode="r")
+    if len(points) % 2:
+        raise ValueError(f"{path} holds an odd number of float64 values")
+    return points.reshape(-1, 2)
+
+
+def triangulate(points, parallel=False, workers=None, order="brio", seed=None):
+    """Triangulates an (n, 2) array of points without recording and returns the
+    triangles and edges as int64 arrays of input rows. With parallel the strips of
+    Triangulation.strip_delaunay are triangulated in workers processes."""
+    triang = tri.Triangulation(points, record=False, order=order, seed=seed)
+    if parallel:
+        triang.strip_delaunay(workers)
+    else:
+        triang.incremental_delaunay()
+    triangles = np.array(triang.get_triangles(), dtype=np.int64).reshape(-1, 3)
+    edges = np.array(triang.get_edges(), dtype=np.int64).reshape(-1, 2)
+    return triangles, edges
+
+
+def write_mesh(path, point_count, triangles, edges):
+    index = np.dtype("<u4") if point_count < 2 ** 32 else np.dtype("<u8")
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, index.itemsize, point_count, len(triangles), len(edges)))
+        f.write(np.ascontiguousarray(triangles, dtype=index).tobytes())
+        f.write(np.ascontiguousarray(edges, dtype=index).tobytes())
+
+
+def read_mesh(path):
+    """Memory-maps a mesh written by write_mesh and returns (point count, triangles,
+    edges)."""
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError(f"{path} is not a mesh file")
+    magic, version, index_size, point_count, n_triangles, n_edges = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION or index_size not in (4, 8):
+        raise ValueError(f"{path} is not a version {VERSION} mesh file")
+    index = np.dtype(f"<u{index_size}")
+    triangles = map_block(path, index, HEADER.size, n_triangles, 3)
+    edges = map_block(path, index, HEADER.size + n_triangles * 3 * index_size, n_edges, 2)
+    return point_count, triangles, edges
+
+
+def map_block(path, dtype, offset, rows, columns):
+    # numpy cannot memory-map an empty block
+    if rows == 0:
+        return np.zeros((0, columns), dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(rows, columns))
+
+
+def triangulate_file(points_path, mesh_path, parallel=False, workers=None, order="brio", seed=None):
+    """Triangulates the points of points_path and writes the mesh to mesh_path. Returns
+    the point, triangle and edge counts."""
+    points = load_points(points_path)
+    triangles, edges = triangulate(points, parallel, workers, order, seed)
+    write_mesh(mesh_path, len(points), triangles, edges)
+    return len(points), len(triangles), len(edges)
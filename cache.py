@@ -0,0 +1,99 @@
+'''Content-addressed cache for serialized endpoint responses. Keys are a hash of the
+endpoint, the point list and the request options, so repeated demos and shared example
+point sets are answered without running the triangulation again.'''
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+def cache_key(endpoint, points, options):
+    """Canonical sha256 of a request. Coordinates are normalised to floats so that 1 and
+    1.0 hash the same; point order is kept because it changes the animation."""
+    canonical = json.dumps({
+        "endpoint": endpoint,
+        "points": [[float(x), float(y)] for x, y in points],
+        "options": options,
+    }, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ResultCache:
+    """In-process LRU cache limited by entry count and total bytes, optionally backed by a
+    directory so cached results survive restarts."""
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024, directory=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.directory = directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self.entries = OrderedDict()  # key -> bytes, least recently used first
+        self.size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".bin")
+
+    def get(self, key):
+        """Returns the cached body for key, or None on a miss."""
+        with self.lock:
+            body = self.entries.get(key)
+            if body is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return body
+        if self.directory is not None:
+            try:
+                with open(self.path(key), "rb") as f:
+                    body = f.read()
+            except FileNotFoundError:
+                body = None
+            if body is not None:
+                with self.lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                    self.store(key, body)
+                return body
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, body):
+        """Caches body under key. Bodies larger than the byte limit are not cached."""
+        if len(body) > self.max_bytes:
+            return
+        with self.lock:
+            self.store(key, body)
+        if self.directory is not None:
+            # Write to a temporary file first so readers never see a partial result
+            tmp = f"{self.path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(body)
+            os.replace(tmp, self.path(key))
+
+    def store(self, key, body):
+        """Adds body to the in-memory LRU and evicts until both limits hold. Needs the lock."""
+        if key in self.entries:
+            self.size -= len(self.entries.pop(key))
+        self.entries[key] = body
+        self.size += len(body)
+        while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+            self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "bytes": self.size,
+            }
@@ -0,0 +1,36 @@
+'''Command line entry point for batch triangulations that run without the web app.
+
+    python cli.py points.npy mesh.bin
+    python cli.py points.f64 mesh.bin --parallel --workers 8
+
+The points are read from an .npy file or a raw file of float64 x, y pairs and the
+mesh is written in the binary format of bulk_io.
+'''
+import argparse
+import time
+
+import bulk_io
+import triangulation as tri
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("points", help=".npy file of shape (n, 2) or raw float64 x, y pairs")
+    parser.add_argument("mesh", help="output file for the triangles and edges")
+    parser.add_argument("--parallel", action="store_true", help="use the strip-partitioned parallel engine")
+    parser.add_argument("--workers", type=int, help="worker processes for --parallel, all CPUs by default")
+    parser.add_argument("--order", choices=tri.INSERTION_ORDERS, default="brio")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        points, triangles, edges = bulk_io.triangulate_file(args.points, args.mesh, args.parallel, args.workers,
+                                                            args.order, args.seed)
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"error: {e}\n")
+    print(f"{points} points, {triangles} triangles, {edges} edges in {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
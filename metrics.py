@@ -0,0 +1,112 @@
+'''Metrics of the web app. The triangulation jobs report their counters and phase timings
+(see workers.job_metrics); these are sent back per request as headers and added up here,
+and /metrics renders the totals together with the cache, pool and session stats in the
+Prometheus text format.'''
+import threading
+
+# Counters of Triangulation.stats(), with the name and help of their metric
+COUNTERS = {
+    "insertions": ("triangulation_insertions_total", "Points inserted."),
+    "flips": ("triangulation_flips_total", "Edges flipped."),
+    "in_circle_tests": ("triangulation_in_circle_tests_total", "In-circle tests."),
+    "bucket_moves": ("triangulation_bucket_moves_total", "Uninserted points moved to a new bucket."),
+    "walk_steps": ("triangulation_walk_steps_total", "Faces visited by point location walks."),
+    "steps": ("triangulation_steps_total", "Drawing steps recorded."),
+}
+
+# Stats of the app's components: key -> (type, help). Counters get a _total suffix.
+CACHE_STATS = {
+    "hits": ("counter", "Responses served from the memory cache."),
+    "disk_hits": ("counter", "Responses served from the disk cache."),
+    "misses": ("counter", "Responses that had to be computed."),
+    "evictions": ("counter", "Responses evicted from the memory cache."),
+    "entries": ("gauge", "Responses in the memory cache."),
+    "bytes": ("gauge", "Size of the responses in the memory cache."),
+}
+POOL_STATS = {
+    "workers": ("gauge", "Worker processes."),
+    "max_queued": ("gauge", "Jobs that may wait for a worker."),
+    "active": ("gauge", "Jobs running or waiting."),
+    "submitted": ("counter", "Jobs submitted."),
+    "completed": ("counter", "Jobs completed."),
+    "rejected": ("counter", "Jobs rejected because the pool was saturated."),
+    "timed_out": ("counter", "Jobs stopped at their deadline."),
+    "cancelled": ("counter", "Jobs cancelled."),
+    "failed": ("counter", "Jobs that raised an error."),
+}
+SESSION_STATS = {
+    "sessions": ("gauge", "Live sessions."),
+    "created": ("counter", "Sessions created."),
+    "expired": ("counter", "Sessions expired."),
+    "evicted": ("counter", "Sessions evicted to make room."),
+}
+
+
+def headers(metrics):
+    """Response headers for the metrics of one job: the phase timings as Server-Timing,
+    which browsers show with the request, and the counters as X-Triangulation-Metrics."""
+    timing = ", ".join(f"{phase};dur={seconds * 1000:.2f}" for phase, seconds in metrics["seconds"].items())
+    counters = ", ".join(f"{key}={metrics[key]}" for key in COUNTERS)
+    return {"Server-Timing": timing, "X-Triangulation-Metrics": counters}
+
+
+def family(name, kind, help_text, samples):
+    """Lines of one metric family; samples are (labels, value) pairs."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        if labels:
+            label_text = ",".join(f'{label}="{text}"' for label, text in labels.items())
+            lines.append(f"{name}{{{label_text}}} {value}")
+        else:
+            lines.append(f"{name} {value}")
+    return lines
+
+
+def stats_families(prefix, stats, described, renamed=None):
+    lines = []
+    for key, (kind, help_text) in described.items():
+        if key in stats:
+            name = f"{prefix}_{(renamed or {}).get(key, key)}"
+            if kind == "counter":
+                name += "_total"
+            lines += family(name, kind, help_text, [({}, stats[key])])
+    return lines
+
+
+class RequestMetrics:
+    """Totals of the job metrics per endpoint. Thread-safe."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = {}  # endpoint -> jobs observed
+        self.counters = {}  # (stats key, endpoint) -> total
+        self.seconds = {}  # (endpoint, phase) -> total
+
+    def observe(self, endpoint, metrics):
+        if metrics is None:
+            return
+        with self.lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            for key in COUNTERS:
+                self.counters[key, endpoint] = self.counters.get((key, endpoint), 0) + metrics[key]
+            for phase, seconds in metrics["seconds"].items():
+                self.seconds[endpoint, phase] = self.seconds.get((endpoint, phase), 0.0) + seconds
+
+    def render(self, cache_stats=None, pool_stats=None, session_stats=None):
+        """The totals and the given component stats in the Prometheus text format."""
+        with self.lock:
+            lines = family("triangulation_requests_total", "counter", "Triangulation jobs that reported metrics.",
+                           [({"endpoint": endpoint}, count) for endpoint, count in sorted(self.requests.items())])
+            for key, (name, help_text) in COUNTERS.items():
+                lines += family(name, "counter", help_text,
+                                [({"endpoint": endpoint}, self.counters[key, endpoint]) for endpoint in sorted(self.requests)])
+            lines += family("triangulation_seconds_total", "counter",
+                            "Time spent per phase. update_plot, locate and buckets are part of triangulate or stream.",
+                            [({"endpoint": endpoint, "phase": phase}, seconds)
+                             for (endpoint, phase), seconds in sorted(self.seconds.items())])
+        if cache_stats is not None:
+            lines += stats_families("triangulation_cache", cache_stats, CACHE_STATS)
+        if pool_stats is not None:
+            lines += stats_families("triangulation_pool", pool_stats, POOL_STATS)
+        if session_stats is not None:
+            lines += stats_families("triangulation_session", session_stats, SESSION_STATS, {"sessions": "live"})
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,108 @@
+'''Robust geometric predicates for the triangulation. Each predicate is first evaluated in
+floating point together with an error bound (Shewchuk, "Adaptive Precision
+Floating-Point Arithmetic and Fast Robust Geometric Predicates"); only when the result
+is within the bound of zero is it recomputed exactly with integers. The sign of the
+returned value is always correct for the given float coordinates.
+
+incircle never returns zero for four distinct points: cocircular ties are broken by a
+symbolic perturbation that depends only on the coordinates, so every triangulation of
+the same points, e.g. the strips and seams of strip_delaunay, picks the same diagonal.'''
+import numpy as np
+
+EPSILON = 2.0 ** -53
+CCW_BOUND = (3.0 + 16.0 * EPSILON) * EPSILON
+ICC_BOUND = (10.0 + 96.0 * EPSILON) * EPSILON
+
+
+def orient2d(ax, ay, bx, by, cx, cy):
+    """Positive if a, b, c are in counter-clockwise order, negative if clockwise and
+    zero if they are collinear. The magnitude is about twice the triangle's area."""
+    detleft = (ax - cx) * (by - cy)
+    detright = (ay - cy) * (bx - cx)
+    det = detleft - detright
+    if abs(det) > CCW_BOUND * (abs(detleft) + abs(detright)):
+        return det
+    return orient2d_exact(ax, ay, bx, by, cx, cy)
+
+
+def scaled(*values):
+    """The values as integers, all multiplied by the same power of two, and that
+    power. Floats are dyadic, so this is exact and much faster than fractions."""
+    ratios = [float(value).as_integer_ratio() for value in values]
+    scale = max(denominator for _, denominator in ratios)
+    return [numerator * (scale // denominator) for numerator, denominator in ratios], scale
+
+
+def signed(det, divisor):
+    """det / divisor as a float, keeping the sign if the quotient underflows."""
+    value = det / divisor
+    if value == 0 and det:
+        return 5e-324 if det > 0 else -5e-324
+    return value
+
+
+def orient2d_exact(ax, ay, bx, by, cx, cy):
+    (ax, ay, bx, by, cx, cy), scale = scaled(ax, ay, bx, by, cx, cy)
+    return signed((ax - cx) * (by - cy) - (ay - cy) * (bx - cx), scale ** 2)
+
+
+def orient2d_many(ax, ay, bx, by, cx, cy):
+    """orient2d of the fixed points a and b with every point of the arrays cx, cy."""
+    detleft = (ax - cx) * (by - cy)
+    detright = (ay - cy) * (bx - cx)
+    det = detleft - detright
+    uncertain = np.abs(det) <= CCW_BOUND * (np.abs(detleft) + np.abs(detright))
+    if uncertain.any():
+        for i in np.flatnonzero(uncertain).tolist():
+            det[i] = orient2d_exact(ax, ay, bx, by, float(cx[i]), float(cy[i]))
+    return det
+
+
+def incircle(ax, ay, bx, by, cx, cy, dx, dy):
+    """Positive if d lies inside the circle through the counter-clockwise triangle
+    a, b, c and negative if outside. Cocircular points count as inside or outside
+    as if they were perturbed, see incircle_exact."""
+    adx, ady = ax - dx, ay - dy
+    bdx, bdy = bx - dx, by - dy
+    cdx, cdy = cx - dx, cy - dy
+    bdxcdy = bdx * cdy
+    cdxbdy = cdx * bdy
+    alift = adx * adx + ady * ady
+    cdxady = cdx * ady
+    adxcdy = adx * cdy
+    blift = bdx * bdx + bdy * bdy
+    adxbdy = adx * bdy
+    bdxady = bdx * ady
+    clift = cdx * cdx + cdy * cdy
+    det = alift * (bdxcdy - cdxbdy) + blift * (cdxady - adxcdy) + clift * (adxbdy - bdxady)
+    permanent = ((abs(bdxcdy) + abs(cdxbdy)) * alift
+                 + (abs(cdxady) + abs(adxcdy)) * blift
+                 + (abs(adxbdy) + abs(bdxady)) * clift)
+    if abs(det) > ICC_BOUND * permanent:
+        return det
+    return incircle_exact(ax, ay, bx, by, cx, cy, dx, dy)
+
+
+def incircle_exact(ax, ay, bx, by, cx, cy, dx, dy):
+    """incircle computed exactly. For cocircular points the lift x² + y² of every
+    point is raised by a distinct infinitesimal, the largest for the lexicographically
+    smallest point; the sign then comes from the first point whose raise changes the
+    determinant, and is returned as ±EPSILON."""
+    (ax_, ay_, bx_, by_, cx_, cy_, dx_, dy_), scale = scaled(ax, ay, bx, by, cx, cy, dx, dy)
+    adx, ady = ax_ - dx_, ay_ - dy_
+    bdx, bdy = bx_ - dx_, by_ - dy_
+    cdx, cdy = cx_ - dx_, cy_ - dy_
+    # The determinant is linear in each lift: these are the coefficients of a, b and c,
+    # and raising d lowers the other three lifts relative to it
+    alift = bdx * cdy - cdx * bdy
+    blift = cdx * ady - adx * cdy
+    clift = adx * bdy - bdx * ady
+    det = (adx * adx + ady * ady) * alift + (bdx * bdx + bdy * bdy) * blift + (cdx * cdx + cdy * cdy) * clift
+    if det:
+        return signed(det, scale ** 4)
+    coefficients = [alift, blift, clift, -(alift + blift + clift)]
+    points = [(ax, ay), (bx, by), (cx, cy), (dx, dy)]
+    for i in sorted(range(4), key=lambda i: points[i]):
+        if coefficients[i]:
+            return EPSILON if coefficients[i] > 0 else -EPSILON
+    return 0.0
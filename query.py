@@ -0,0 +1,277 @@
+'''Queries on a finished Triangulation: the Voronoi cells of the sites, and batched
+nearest-site and point-in-triangle lookups. Results refer to sites by their input
+point index, like Triangulation.get_triangles. The triangulation must not change while
+a query runs.'''
+import math
+
+import numpy as np
+
+import predicates
+import triangulation as tri
+
+
+def voronoi_cells(triang):
+    """Returns a dict mapping each site index to its Voronoi cell, an (k, 2) array of
+    the cell's vertices in counter-clockwise order. Sites on the convex hull have
+    unbounded cells and are left out. The vertices are the circumcentres of the faces
+    around the site, computed for all faces at once. The faces of boundary_sites can
+    be ones the supertriangle changed, so their cells are clipped from the bisectors
+    instead (see clipped_cell)."""
+    vertices = list(triang.vertices)
+    if not vertices:
+        return {}
+    rows = {v.id: i for i, v in enumerate(vertices)}
+    coords = np.array([(v.x, v.y) for v in vertices], dtype=float)
+    index = np.array([-1 if v.index is None else v.index for v in vertices], dtype=np.int64)
+    triangles = np.array([(rows[e.origin.id], rows[e.next.origin.id], rows[e.prev.origin.id])
+                          for e in (face.outer_component for face in triang.faces)], dtype=np.int64).reshape(-1, 3)
+    centres = tri.circumcircles(coords, triangles)[0]
+    boundary = boundary_sites(triang)
+    # Every face contributes its circumcentre to the cells of its three corners, which
+    # is the whole cell for every site but the supertriangle corners and boundary sites
+    sites = triangles.ravel()
+    faces = np.repeat(np.arange(len(triangles)), 3)
+    incomplete = index < 0
+    incomplete[[rows[v.id] for v in boundary]] = True
+    keep = ~incomplete[sites]
+    sites, faces = sites[keep], faces[keep]
+    # A site lies inside its convex cell, so sorting by angle orders the vertices
+    offsets = centres[faces] - coords[sites]
+    angles = np.arctan2(offsets[:, 1], offsets[:, 0])
+    order = np.lexsort((angles, sites))
+    sites, faces = sites[order], faces[order]
+    starts = np.flatnonzero(np.r_[True, sites[1:] != sites[:-1]]) if len(sites) else np.zeros(0, dtype=np.int64)
+    cells = dict(zip(index[sites[starts]].tolist(), np.split(centres[faces], starts[1:])))
+    # The edges a boundary site misses join it to other boundary sites
+    boundary_coords = np.array([(v.x, v.y) for v in boundary], dtype=float).reshape(-1, 2)
+    for k in np.flatnonzero(~convex_hull(boundary_coords)).tolist():
+        v = boundary[k]
+        others = [(u.x, u.y) for u in neighbours(v) if u.index is not None]
+        cell = clipped_cell((v.x, v.y), np.concatenate([np.array(others, dtype=float).reshape(-1, 2),
+                                                        np.delete(boundary_coords, k, axis=0)]))
+        if cell is not None:
+            cells[v.index] = cell
+    return cells
+
+
+def convex_hull(coords):
+    """A mask of the rows of coords on the boundary of their convex hull, including
+    points inside a hull edge, whose cells are unbounded too."""
+    on_hull = np.zeros(len(coords), dtype=bool)
+    order = np.lexsort((coords[:, 1], coords[:, 0])).tolist()
+    xy = coords.tolist()
+    for chain in (order, order[::-1]):
+        hull = []
+        for i in chain:
+            while len(hull) > 1 and predicates.orient2d(*xy[hull[-2]], *xy[hull[-1]], *xy[i]) < 0:
+                hull.pop()
+            hull.append(i)
+        on_hull[hull] = True
+    return on_hull
+
+
+def clipped_cell(site, others, growth=16.0, max_growth=2.0 ** 40):
+    """The Voronoi cell of site among the (n, 2) array of points others, as a box around
+    site cut by their bisectors, nearest first, until the rest are too far to cut it.
+    The box grows while the cell reaches its sides; None if the cell is unbounded."""
+    offsets = np.asarray(others, dtype=float) - site
+    distances = np.hypot(offsets[:, 0], offsets[:, 1])
+    order = np.argsort(distances, kind="stable")
+    offsets, distances = offsets[order].tolist(), distances[order].tolist()
+    if not offsets:
+        return None
+    size = 2 * distances[-1] or 1.0
+    limit = size * max_growth
+    while size <= limit:
+        polygon = [(-size, -size), (size, -size), (size, size), (-size, size)]
+        for (ox, oy), distance in zip(offsets, distances):
+            if distance / 2 > max(math.hypot(x, y) for x, y in polygon):
+                break
+            polygon = clip(polygon, ox, oy, (ox * ox + oy * oy) / 2)
+        if max(max(abs(x), abs(y)) for x, y in polygon) < size:
+            return np.array(polygon) + site
+        size *= growth
+    return None
+
+
+def clip(polygon, ox, oy, c):
+    """The part of a convex polygon where x * ox + y * oy <= c, in the same order."""
+    clipped = []
+    for (x0, y0), (x1, y1) in zip(polygon, polygon[1:] + polygon[:1]):
+        d0, d1 = x0 * ox + y0 * oy - c, x1 * ox + y1 * oy - c
+        if d0 <= 0:
+            clipped.append((x0, y0))
+        if (d0 < 0 < d1) or (d1 < 0 < d0):
+            t = d0 / (d0 - d1)
+            clipped.append((x0 + t * (x1 - x0), y0 + t * (y1 - y0)))
+    return clipped
+
+
+def supertriangle(triang):
+    """The corners of the supertriangle in counter-clockwise order, or None for
+    triangulations built without one (see Triangulation.strip_delaunay)."""
+    corners = list({point for edge in triang.supertriangle_edges for point in edge})
+    if len(corners) != 3:
+        return None
+    (ax, ay), (bx, by), (cx, cy) = corners
+    if predicates.orient2d(ax, ay, bx, by, cx, cy) < 0:
+        corners.reverse()
+    return corners
+
+
+def visiting_order(triang, coords, inside_only=False):
+    """The query rows along a Hilbert curve over the supertriangle's bounding box, so
+    far outliers do not squeeze the other points into a few cells of the curve. With
+    inside_only the points outside the supertriangle, which no walk can reach, are
+    left out."""
+    corners = supertriangle(triang)
+    if corners is None:
+        return np.argsort(tri.hilbert_index(coords), kind="stable").tolist()
+    inside = np.ones(len(coords), dtype=bool)
+    if inside_only:
+        for (ax, ay), (bx, by) in zip(corners, corners[1:] + corners[:1]):
+            inside &= predicates.orient2d_many(ax, ay, bx, by, coords[:, 0], coords[:, 1]) >= 0
+    rows = np.flatnonzero(inside)
+    if len(rows) == 0:
+        return []
+    clipped = np.clip(coords[rows], np.min(corners, axis=0), np.max(corners, axis=0))
+    return rows[np.argsort(tri.hilbert_index(clipped), kind="stable")].tolist()
+
+
+def locate_many(triang, points):
+    """Returns the face containing each point, or None for points outside the
+    supertriangle. The points are visited along a Hilbert curve and every walk starts
+    at the previous answer, so the walks stay short."""
+    coords = np.asarray(points, dtype=float).reshape(-1, 2)
+    faces = [None] * len(coords)
+    if len(coords) == 0:
+        return faces
+    xy = coords.tolist()
+    face = None
+    for i in visiting_order(triang, coords, inside_only=True):
+        point = tuple(xy[i])
+        found = triang.walk(face, point) if face is not None else triang.locate(point)
+        faces[i] = found
+        face = found or face
+    return faces
+
+
+def containing_triangles(faces):
+    """The site indices of each located face, or None for faces of the supertriangle
+    (points outside the convex hull of the sites)."""
+    triangles = []
+    for face in faces:
+        if face is None:
+            triangles.append(None)
+            continue
+        e = face.outer_component
+        triangle = (e.origin.index, e.next.origin.index, e.prev.origin.index)
+        triangles.append(None if None in triangle else triangle)
+    return triangles
+
+
+def neighbours(vertex):
+    """The vertices joined to vertex by an edge. Without a supertriangle the star of a
+    hull vertex is open, then it is followed from the incident edge both ways."""
+    start = edge = vertex.incident_edge
+    if start is None:
+        return
+    while True:
+        yield edge.next.origin
+        if edge.prev.twin is None:
+            yield edge.prev.origin
+            break
+        edge = edge.prev.twin
+        if edge is start:
+            return
+    edge = start.twin
+    while edge is not None:
+        edge = edge.next
+        yield edge.next.origin
+        edge = edge.twin
+
+
+def boundary_sites(triang):
+    """The sites joined to a supertriangle corner by an edge, or the sites on an edge
+    with a single face or on no edge at all when there is no supertriangle. Taking the
+    corners out of the triangulation would only add edges between these sites, and
+    every site on the convex hull is one of them."""
+    corners = [v for v in triang.vertices if v.index is None]
+    if corners:
+        return list({v.id: v for corner in corners for v in neighbours(corner) if v.index is not None}.values())
+    sites = {v.id: v for v in triang.vertices if v.incident_edge is None}
+    for edge in triang.half_edges:
+        if edge.twin is None:
+            for v in (edge.origin, edge.next.origin):
+                sites[v.id] = v
+    return list(sites.values())
+
+
+def descend(vertex, px, py, sites_only=False):
+    """Moves from vertex to a closer neighbour of (px, py) while there is one."""
+    distance = (vertex.x - px) ** 2 + (vertex.y - py) ** 2
+    improved = True
+    while improved:
+        improved = False
+        for v in neighbours(vertex):
+            if sites_only and v.index is None:
+                continue
+            d = (v.x - px) ** 2 + (v.y - py) ** 2
+            if d < distance:
+                vertex, distance, improved = v, d, True
+    return vertex
+
+
+def nearest_sites(triang, points, faces=None, chunk_size=4096):
+    """Returns the index of the site nearest to each point, None if there are no sites.
+    The search starts at the closest corner of the point's face (see locate_many), or
+    at the previous answer for points outside the supertriangle, and moves to a closer
+    neighbour while there is one. In a Delaunay triangulation a vertex without a closer
+    neighbour is the nearest vertex, but the supertriangle corners are vertices too and
+    displace edges between boundary_sites. A search that ends at a corner or a boundary
+    site starts again from the nearest boundary site, found by comparing them directly,
+    and moves over sites only: no boundary site is closer and every displaced edge joins
+    two of them, so where it stops no site is closer."""
+    coords = np.asarray(points, dtype=float).reshape(-1, 2)
+    nearest = [None] * len(coords)
+    if len(coords) == 0 or not any(v.index is not None for v in triang.vertices):
+        return nearest
+    if faces is None:
+        faces = locate_many(triang, coords)
+    sites = boundary_sites(triang)
+    boundary = {v.id for v in sites}
+    best = next(iter(triang.vertices))
+    xy = coords.tolist()
+    restart = []
+    # Visit the points along the curve, so the previous answer is close as well
+    for i in visiting_order(triang, coords):
+        px, py = xy[i]
+        face = faces[i]
+        if face is not None:
+            e = face.outer_component
+            best = min((e.origin, e.next.origin, e.prev.origin), key=lambda v: (v.x - px) ** 2 + (v.y - py) ** 2)
+        best = descend(best, px, py)
+        if best.index is None or best.id in boundary:
+            restart.append(i)
+        else:
+            nearest[i] = best.index
+    if restart:
+        site_coords = np.array([(v.x, v.y) for v in sites], dtype=float)
+        restart = np.array(restart)
+        for start in range(0, len(restart), chunk_size):
+            rows = restart[start:start + chunk_size]
+            distances = ((coords[rows, None, :] - site_coords[None, :, :]) ** 2).sum(axis=2)
+            for i, k in zip(rows.tolist(), distances.argmin(axis=1).tolist()):
+                px, py = xy[i]
+                nearest[i] = descend(sites[k], px, py, sites_only=True).index
+    return nearest
+
+
+def answer(triang, points, voronoi=False):
+    """The nearest site and the containing triangle of every point, plus the bounded
+    Voronoi cells if voronoi is set, as the /query endpoint returns them."""
+    faces = locate_many(triang, points)
+    result = {"nearest": nearest_sites(triang, points, faces), "triangles": containing_triangles(faces)}
+    if voronoi:
+        result["cells"] = [{"site": site, "polygon": cell.tolist()} for site, cell in voronoi_cells(triang).items()]
+    return result
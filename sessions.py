@@ -0,0 +1,133 @@
+'''Server-side triangulation sessions for interactive clients. A session keeps a
+Triangulation alive between requests so that adding or removing a point only costs the
+local retriangulation around it, and only the steps of that change are sent back.
+Sessions live in the memory of one server process and expire after ttl seconds
+without a request.'''
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+import query
+import triangulation as tri
+
+
+class SessionNotFound(Exception):
+    """The session id is unknown or the session has expired."""
+
+
+class Session:
+    def __init__(self, triangulation, bounds):
+        self.triangulation = triangulation
+        self.bounds = bounds  # (min_x, min_y, max_x, max_y) that points must lie in
+        self.lock = threading.Lock()  # Changes to one session are applied one at a time
+        self.expires = 0
+
+    def check_bounds(self, points):
+        min_x, min_y, max_x, max_y = self.bounds
+        for x, y in points:
+            if not (min_x <= x <= max_x and min_y <= y <= max_y):
+                raise ValueError(f"Point {(x, y)} is outside the session bounds {self.bounds}")
+
+    def insert(self, points):
+        """Inserts points one after the other and returns the recorded steps. Every point
+        is checked first so that a bad request leaves the session unchanged."""
+        self.check_bounds(points)
+        if len(set(points)) != len(points):
+            raise ValueError("Points are repeated in the request")
+        with self.lock:
+            for point in points:
+                if point in self.triangulation.point_index:
+                    raise ValueError(f"Point {point} is already in the triangulation")
+            steps = []
+            for point in points:
+                steps.extend(self.triangulation.insert(point))
+            return steps
+
+    def remove(self, points):
+        """Removes points one after the other and returns the recorded steps."""
+        if len(set(points)) != len(points):
+            raise ValueError("Points are repeated in the request")
+        with self.lock:
+            for point in points:
+                if point not in self.triangulation.point_index:
+                    raise ValueError(f"Point {point} is not in the triangulation")
+            steps = []
+            for point in points:
+                steps.extend(self.triangulation.remove(point))
+            return steps
+
+    def query(self, points, voronoi=False):
+        """Answers queries against the current triangulation, see query.answer."""
+        with self.lock:
+            return query.answer(self.triangulation, points, voronoi)
+
+
+class SessionStore:
+    """Sessions by id, least recently used first. Expired sessions are dropped lazily on
+    every access and the least recently used one is dropped when max_sessions is hit."""
+    def __init__(self, ttl=600, max_sessions=1024):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def create(self, bounds, record_format="delta", keyframe_interval=50, storage="objects"):
+        """Starts an empty session whose supertriangle covers bounds. Returns the id and
+        the first step, which shows the supertriangle."""
+        min_x, min_y, max_x, max_y = bounds
+        if not (max_x > min_x and max_y > min_y):
+            raise ValueError(f"Session bounds {bounds} are empty")
+        triang = tri.Triangulation(record_format=record_format, keyframe_interval=keyframe_interval, storage=storage)
+        triang.create_supertriangle(bounds)
+        session = Session(triang, tuple(bounds))
+        session_id = secrets.token_urlsafe(16)
+        with self.lock:
+            self.expire()
+            while len(self.sessions) >= self.max_sessions:
+                self.sessions.popitem(last=False)
+                self.evicted += 1
+            session.expires = time.time() + self.ttl
+            self.sessions[session_id] = session
+            self.created += 1
+        return session_id, triang.drain_record()
+
+    def get(self, session_id):
+        """Returns the session and extends its lifetime."""
+        with self.lock:
+            self.expire()
+            session = self.sessions.get(session_id)
+            if session is None:
+                raise SessionNotFound(session_id)
+            self.sessions.move_to_end(session_id)
+            session.expires = time.time() + self.ttl
+            return session
+
+    def delete(self, session_id):
+        with self.lock:
+            if self.sessions.pop(session_id, None) is None:
+                raise SessionNotFound(session_id)
+
+    def expire(self):
+        """Drops the expired sessions. Needs the lock."""
+        now = time.time()
+        # Every access moves a session to the end, so the oldest expiry is always first
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if session.expires > now:
+                break
+            del self.sessions[session_id]
+            self.expired += 1
+
+    def stats(self):
+        with self.lock:
+            self.expire()
+            return {
+                "sessions": len(self.sessions),
+                "created": self.created,
+                "expired": self.expired,
+                "evicted": self.evicted,
+            }
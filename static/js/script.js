@@ -16,7 +16,13 @@ document.addEventListener('DOMContentLoaded', function() {
     let animationDelay = 1000; // Default delay (1 second)
     let currentAnimationStep = 0;
     let animationSequence = [];
+    let stepState = null; // Reconstructed state of the last step that was drawn
+    let stepStateIndex = -1;
+    let sequenceComplete = false; // False while steps are still streaming in
+    let sequenceRequest = 0; // Incremented to abandon a sequence that is still streaming
     let animationTimeout = null;
+    // Open the page with ?binary to fetch sequences in the compact binary encoding
+    const useBinary = new URLSearchParams(window.location.search).has('binary');
     let manual = false;
     let paused = false;
 
@@ -26,6 +32,7 @@ document.addEventListener('DOMContentLoaded', function() {
     submitBtn.addEventListener('click', function(){
         animationSequence = [];
         currentAnimationStep = 0;
+        resetStepState();
         getSequence();
         runBtn.disabled = false;
         paused = false;
@@ -86,7 +93,9 @@ document.addEventListener('DOMContentLoaded', function() {
         ctx.clearRect(0, 0, canvas.width, canvas.height);
         points = [];
         animationSequence = [];
+        sequenceRequest++;
         currentAnimationStep = 0;
+        resetStepState();
         submitBtn.disabled = true; // Disable button when clearing
     });
     speedSlider.addEventListener('input', function() {
@@ -117,23 +126,73 @@ document.addEventListener('DOMContentLoaded', function() {
     //Async Functions
     ////////
     async function getSequence() {
-        const response = await fetch('/get_drawing_sequence', {
+        const request = ++sequenceRequest;
+        sequenceComplete = false;
+        if (useBinary) {
+            const response = await fetch('/get_drawing_sequence?encoding=binary', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ points: points, format: 'delta' })
+            });
+            const steps = decodeSequence(await response.arrayBuffer());
+            if (request !== sequenceRequest) {
+                return;
+            }
+            animationSequence.push(...steps);
+            zoomToFit(animationSequence);
+            sequenceComplete = true;
+            return;
+        }
+        const response = await fetch('/stream_drawing_sequence', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
         },
-        body: JSON.stringify({ points: points })  // Send points as JSON
+        body: JSON.stringify({ points: points, format: 'delta' })  // Send points as JSON
         });
-        animationSequence = await response.json();
-        zoomToFit(animationSequence);
+        // Steps arrive as newline-delimited JSON and can be drawn before the rest arrive
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffered = '';
+        while (true) {
+            const { done, value } = await reader.read();
+            if (request !== sequenceRequest) {
+                reader.cancel();
+                return;
+            }
+            buffered += decoder.decode(value, { stream: !done });
+            const lines = buffered.split('\n');
+            buffered = lines.pop();
+            const zoom = animationSequence.length === 0;
+            lines.filter(line => line.length > 0).forEach(line => animationSequence.push(JSON.parse(line)));
+            if (zoom && animationSequence.length > 0) {
+                // The first step holds the supertriangle, which contains everything drawn later
+                zoomToFit(animationSequence);
+            }
+            if (done) {
+                break;
+            }
+        }
+        sequenceComplete = true;
     }
     ////////
     //Helper Functions
     ////////
     function drawStep(){
-        if(currentAnimationStep >= animationSequence.length){return;}
+        if(currentAnimationStep >= animationSequence.length){
+            if(!sequenceComplete && !manual && !paused){
+                // Wait for more steps to arrive
+                animationTimeout = setTimeout(() => drawStep(), animationDelay);
+            }else if(sequenceComplete){
+                runBtn.disabled = true;
+                pauseBtn.disabled = true;
+            }
+            return;
+        }
         if(!manual && paused){return;}
-        const step = animationSequence[currentAnimationStep];
+        const step = stateAt(currentAnimationStep);
         ctx.clearRect(-10000, -10000, 20000, 20000);
         
         // Draw points
@@ -142,7 +201,7 @@ document.addEventListener('DOMContentLoaded', function() {
         });
         
         // Draw uninserted points
-        step.uninserted_points.forEach(([x, y], idx) => {
+        step.uninserted.forEach(([x, y], idx) => {
             drawPoint(x, y, 'red');
         });
 
@@ -166,12 +225,148 @@ document.addEventListener('DOMContentLoaded', function() {
             animationTimeout = setTimeout(() => drawStep(), animationDelay);
         }
         
-        if(currentAnimationStep >= animationSequence.length){
+        if(sequenceComplete && currentAnimationStep >= animationSequence.length){
             runBtn.disabled = true;
             pauseBtn.disabled = true;
             return;
         }
     }
+    // Decodes the binary encoding documented in wire.py into the same steps the JSON
+    // endpoints return
+    function decodeSequence(buffer) {
+        const view = new DataView(buffer);
+        const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+        if (magic !== 'DTSQ' || view.getUint16(4, true) !== 1) {
+            throw new Error('Not a version 1 drawing sequence');
+        }
+        const pointCount = view.getUint32(8, true);
+        const stepCount = view.getUint32(12, true);
+        let offset = 16;
+        const coords = float32Block(buffer, offset, pointCount * 2);
+        offset += pointCount * 8;
+        const table = [];
+        for (let i = 0; i < pointCount; i++) {
+            table.push([coords[2 * i], coords[2 * i + 1]]);
+        }
+        const steps = [];
+        for (let s = 0; s < stepCount; s++) {
+            const [kind, nPoints, nUninserted, nEdges, nRemoved, nCircles] = uint32Block(buffer, offset, 6);
+            offset += 24;
+            const ids = uint32Block(buffer, offset, nPoints + nUninserted + 2 * (nEdges + nRemoved));
+            offset += ids.length * 4;
+            const circleValues = float32Block(buffer, offset, nCircles * 3);
+            offset += nCircles * 12;
+            let at = 0;
+            const takePoints = count => {
+                const taken = [];
+                for (let i = 0; i < count; i++) {
+                    taken.push(table[ids[at++]]);
+                }
+                return taken;
+            };
+            const takeEdges = count => {
+                const taken = [];
+                for (let i = 0; i < count; i++) {
+                    taken.push([table[ids[at++]], table[ids[at++]]]);
+                }
+                return taken;
+            };
+            const circles = [];
+            for (let i = 0; i < nCircles; i++) {
+                circles.push([circleValues[3 * i], circleValues[3 * i + 1], circleValues[3 * i + 2]]);
+            }
+            if (kind === 2) {
+                const step = {
+                    keyframe: false,
+                    inserted_points: takePoints(nPoints)
+                };
+                // Delta steps use the uninserted block for removed points
+                if (nUninserted > 0) {
+                    step.removed_points = takePoints(nUninserted);
+                }
+                step.added_edges = takeEdges(nEdges);
+                step.removed_edges = takeEdges(nRemoved);
+                step.circles = circles;
+                steps.push(step);
+                continue;
+            }
+            const step = {
+                points: takePoints(nPoints),
+                uninserted_points: takePoints(nUninserted),
+                edges: takeEdges(nEdges),
+                circles: circles
+            };
+            if (kind === 1) {
+                step.keyframe = true;
+            }
+            steps.push(step);
+        }
+        return steps;
+    }
+    const littleEndian = new Uint8Array(new Uint16Array([1]).buffer)[0] === 1;
+    // Typed array views use the platform byte order, fall back to DataView on big-endian
+    function uint32Block(buffer, offset, count) {
+        if (littleEndian) {
+            return new Uint32Array(buffer, offset, count);
+        }
+        const view = new DataView(buffer, offset, count * 4);
+        return Uint32Array.from({ length: count }, (_, i) => view.getUint32(i * 4, true));
+    }
+    function float32Block(buffer, offset, count) {
+        if (littleEndian) {
+            return new Float32Array(buffer, offset, count);
+        }
+        const view = new DataView(buffer, offset, count * 4);
+        return Float32Array.from({ length: count }, (_, i) => view.getFloat32(i * 4, true));
+    }
+    function resetStepState() {
+        stepState = null;
+        stepStateIndex = -1;
+    }
+    // Steps are either full snapshots (keyframes) or deltas against the previous step
+    function applyStep(state, step) {
+        if (step.keyframe !== false) {
+            return {
+                points: new Map(step.points.map(p => [pointKey(p), p])),
+                uninserted: new Map(step.uninserted_points.map(p => [pointKey(p), p])),
+                edges: new Map(step.edges.map(e => [edgeKey(e), e])),
+                circles: step.circles
+            };
+        }
+        (step.removed_points || []).forEach(p => state.points.delete(pointKey(p)));
+        step.inserted_points.forEach(p => {
+            state.points.set(pointKey(p), p);
+            state.uninserted.delete(pointKey(p));
+        });
+        step.removed_edges.forEach(e => state.edges.delete(edgeKey(e)));
+        step.added_edges.forEach(e => state.edges.set(edgeKey(e), e));
+        state.circles = step.circles;
+        return state;
+    }
+    function stateAt(index) {
+        if (stepState === null || index !== stepStateIndex + 1) {
+            // Seek: rebuild from the closest keyframe at or before index
+            let start = index;
+            while (start > 0 && animationSequence[start].keyframe === false) {
+                start--;
+            }
+            stepState = applyStep(null, animationSequence[start]);
+            stepStateIndex = start;
+        }
+        while (stepStateIndex < index) {
+            stepStateIndex++;
+            stepState = applyStep(stepState, animationSequence[stepStateIndex]);
+        }
+        return stepState;
+    }
+    function pointKey([x, y]) {
+        return x + ',' + y;
+    }
+    function edgeKey([p1, p2]) {
+        const k1 = pointKey(p1);
+        const k2 = pointKey(p2);
+        return k1 < k2 ? k1 + '|' + k2 : k2 + '|' + k1;
+    }
     function drawPoint(x, y, fill='blue') {
         ctx.beginPath();
         ctx.arc(x, y, 5, 0, Math.PI * 2);
@@ -223,7 +418,7 @@ document.addEventListener('DOMContentLoaded', function() {
             });
 
             // Check edges
-            step.edges?.forEach(([[x1, y1], [x2, y2]]) => {
+            [...(step.edges ?? []), ...(step.added_edges ?? [])].forEach(([[x1, y1], [x2, y2]]) => {
                 minX = Math.min(minX, x1, x2);
                 minY = Math.min(minY, y1, y2);
                 maxX = Math.max(maxX, x1, x2);
@@ -1,19 +1,26 @@
 import math
+import os
 import time
 import random
+from concurrent.futures import ProcessPoolExecutor
 from numpy import random
 import numpy as np
+import predicates
 '''This is a version of the Triangulation.py file that has been modified so that the triangulation class 
 has a display attirbute which it can use to update the visualization of a triangulation.
 For better comments on the Triangulation algorithm check the Triangulation.py file'''
 class Vertex:
     """Represents a vertex in the DCEL."""
-    def __init__(self, x, y):
+    def __init__(self, x, y, id=-1):
         self.x = x  # Coordinates
         self.y = y
+        self.id = id
         self.incident_edge = None  # Pointer to an arbitrary outgoing half-edge
         self.incident_edges = set()
         self.visualization = False
+        self.index = None  # Position in the input point list, None for supertriangle vertices
+        self.alive = False  # True while the vertex is part of the triangulation
+        self.slot = -1  # Index in the Registry slot table
 
     def __repr__(self):
         return f"({self.x}, {self.y})"
@@ -28,6 +35,8 @@ class HalfEdge:
         self.prev = None         # Previous half-edge in the face
         self.face = None  # Face to the left of this half-edge
         self.id = id
+        self.alive = False
+        self.slot = -1
     def toString(self):
         return f"!D: {self.id} {self.origin} -> {self.next.origin})"
     def __repr__(self):
@@ -42,6 +51,8 @@ class Face:
         self.outer_component = None  # Pointer to a half-edge on the outer boundary
         self.inner_components = []   # List of half-edges for holes (empty for normal triangles)
         self.id = id
+        self.alive = False  # True while the face is part of the triangulation
+        self.slot = -1  # Index in the Registry slot table
     def isEqual(self, other):
         return self.getPoints() == other.getPoints()
     def getPoints(self):
@@ -58,17 +69,324 @@ class Face:
         return ret
 
 
+# Compact storage engine: the same DCEL records as Vertex, HalfEdge and Face but
+# with __slots__ instead of a per-instance __dict__, and without the per-vertex
+# incident_edges set. Select it with Triangulation(points, storage="slots").
+class SlotVertex:
+    __slots__ = ("x", "y", "id", "index", "incident_edge", "alive", "slot")
+
+    def __init__(self, x, y, id=-1):
+        self.x = x
+        self.y = y
+        self.id = id
+        self.index = None
+        self.incident_edge = None
+        self.alive = False
+        self.slot = -1
+
+    __repr__ = Vertex.__repr__
+
+
+class SlotHalfEdge:
+    __slots__ = ("origin", "twin", "next", "prev", "face", "id", "alive", "slot")
+
+    def __init__(self, id=-1):
+        self.origin = None
+        self.twin = None
+        self.next = None
+        self.prev = None
+        self.face = None
+        self.id = id
+        self.alive = False
+        self.slot = -1
+
+    toString = HalfEdge.toString
+    __repr__ = HalfEdge.__repr__
+
+
+class SlotFace:
+    __slots__ = ("outer_component", "inner_components", "id", "alive", "slot")
+
+    def __init__(self, id=-1):
+        self.outer_component = None
+        self.inner_components = ()
+        self.id = id
+        self.alive = False
+        self.slot = -1
+
+    isEqual = Face.isEqual
+    getPoints = Face.getPoints
+    __repr__ = Face.__repr__
+
+
+STORAGE_ENGINES = {
+    "objects": (Vertex, HalfEdge, Face),
+    "slots": (SlotVertex, SlotHalfEdge, SlotFace),
+}
+
+
+class Registry:
+    """Stores the live vertices, half-edges or faces in a slot table with a free
+    list so that adding, removing and membership checks are constant time.
+    Iterating, len() and printing behave like the list it replaces."""
+    def __init__(self):
+        self.slots = []
+        self.free = []
+        self.count = 0
+
+    def append(self, item):
+        if self.free:
+            item.slot = self.free.pop()
+            self.slots[item.slot] = item
+        else:
+            item.slot = len(self.slots)
+            self.slots.append(item)
+        item.alive = True
+        self.count += 1
+
+    def extend(self, items):
+        slots, free = self.slots, self.free
+        for item in items:
+            if free:
+                item.slot = free.pop()
+                slots[item.slot] = item
+            else:
+                item.slot = len(slots)
+                slots.append(item)
+            item.alive = True
+        self.count += len(items)
+
+    def remove(self, item):
+        if item not in self:
+            raise ValueError(f"{type(item).__name__} {item.id} is not in the triangulation")
+        self.slots[item.slot] = None
+        self.free.append(item.slot)
+        item.alive = False
+        self.count -= 1
+
+    def __contains__(self, item):
+        return item.alive and 0 <= item.slot < len(self.slots) and self.slots[item.slot] is item
+
+    def __iter__(self):
+        for item in self.slots:
+            if item is not None:
+                yield item
+
+    def __len__(self):
+        return self.count
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+INSERTION_ORDERS = ("input", "random", "brio")
+LOCATION_STRATEGIES = ("buckets", "walk", "jump")
+
+
+class TriangulationCancelled(Exception):
+    """Raised when the should_stop callback passed to incremental_delaunay returns True."""
+
+
+def hilbert_index(coords, bits=16):
+    """Position of every point along a Hilbert curve over the bounding box of coords."""
+    side = (1 << bits) - 1
+    low = coords.min(axis=0)
+    extent = np.maximum(coords.max(axis=0) - low, 1e-300)
+    cells = ((coords - low) / extent * side).astype(np.int64)
+    x = cells[:, 0]
+    y = cells[:, 1]
+    d = np.zeros(len(coords), dtype=np.int64)
+    s = 1 << (bits - 1)
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += s * s * ((3 * rx) ^ ry)
+        # Rotate the quadrant so the curve continues in the right direction
+        flip = ~ry & rx
+        x = np.where(flip, side - x, x)
+        y = np.where(flip, side - y, y)
+        x, y = np.where(ry, x, y), np.where(ry, y, x)
+        s >>= 1
+    return d
+
+
+def insertion_order(coords, order="input", seed=None):
+    """Returns the coords rows in the order they should be inserted.
+    "input" keeps the input order, "random" shuffles it and "brio" is a biased randomized
+    insertion order: a random half of the points is left for the last round, half of
+    the rest for the round before and so on, and each round is sorted along a Hilbert
+    curve so consecutive insertions are close together."""
+    n = len(coords)
+    if order == "input":
+        return list(range(n))
+    rng = np.random.default_rng(seed)
+    shuffled = rng.permutation(n)
+    if order == "random":
+        return shuffled.tolist()
+    if order != "brio":
+        raise ValueError(f"Unknown insertion order: {order}")
+    curve = hilbert_index(coords) if n else np.zeros(0, dtype=np.int64)
+    rounds = []
+    end = n
+    while end > 0:
+        start = end // 2 if end > 16 else 0
+        members = shuffled[start:end]
+        rounds.append(members[np.argsort(curve[members], kind="stable")])
+        end = start
+    return np.concatenate(rounds[::-1]).tolist() if rounds else []
+
+
+def circumcircles(coords, triangles):
+    """Centres and squared radii of the circumcircles of an (m, 3) array of coords rows."""
+    a = coords[triangles[:, 0]]
+    b = coords[triangles[:, 1]]
+    c = coords[triangles[:, 2]]
+    # Work relative to a to keep the products small
+    bx, by = (b - a).T
+    cx, cy = (c - a).T
+    d = 2 * (bx * cy - by * cx)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ux = (cy * (bx * bx + by * by) - by * (cx * cx + cy * cy)) / d
+        uy = (bx * (cx * cx + cy * cy) - cx * (bx * bx + by * by)) / d
+    centres = np.column_stack((ux, uy)) + a
+    return centres, ux * ux + uy * uy
+
+
+def strip_triangles(points, seed):
+    """Worker for Triangulation.strip_delaunay: the triangles of one strip as row indices
+    into points."""
+    triang = Triangulation(points, record=False, order="random", seed=seed)
+    triang.incremental_delaunay()
+    return np.array(triang.get_triangles(), dtype=np.int64).reshape(-1, 3)
+
+
+class PointGrid:
+    """Uniform grid over a set of coords rows for finding the rows inside a circle."""
+    def __init__(self, coords, rows):
+        self.coords = coords
+        self.low = coords[rows].min(axis=0) if len(rows) else np.zeros(2)
+        extent = (coords[rows].max(axis=0) - self.low) if len(rows) else np.ones(2)
+        self.cell = max(float(np.sqrt(extent[0] * extent[1] / max(len(rows), 1))) * 2, 1e-9)
+        self.nx = int(extent[0] / self.cell) + 1
+        self.ny = int(extent[1] / self.cell) + 1
+        cells = ((coords[rows] - self.low) / self.cell).astype(np.int64)
+        keys = cells[:, 1] * self.nx + cells[:, 0]
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.rows = np.asarray(rows)[order]
+
+    def any_inside(self, centre, r2, triangle):
+        """True if some grid point lies inside the circumcircle of triangle, three
+        counter-clockwise coords rows with the given centre and squared radius. Points
+        near the circle are decided by predicates.incircle, so cocircular ties are
+        broken the same way as in the triangulations."""
+        r = math.sqrt(r2)
+        x0, y0 = ((centre - r - self.low) / self.cell).astype(np.int64)
+        x1, y1 = ((centre + r - self.low) / self.cell).astype(np.int64)
+        x0, x1 = max(x0, 0), min(x1, self.nx - 1)
+        y0, y1 = max(y0, 0), min(y1, self.ny - 1)
+        for y in range(y0, y1 + 1):
+            start = np.searchsorted(self.keys, y * self.nx + x0)
+            end = np.searchsorted(self.keys, y * self.nx + x1, side="right")
+            if start == end:
+                continue
+            rows = self.rows[start:end]
+            d = self.coords[rows] - centre
+            d2 = (d * d).sum(axis=1)
+            if np.any(d2 < r2 * (1 - 1e-6)):
+                return True
+            (ax, ay), (bx, by), (cx, cy) = self.coords[triangle].tolist()
+            for px, py in self.coords[rows[d2 <= r2 * (1 + 1e-6)]].tolist():
+                if predicates.incircle(ax, ay, bx, by, cx, cy, px, py) > 0:
+                    return True
+        return False
+
+
 class Triangulation:
-    def __init__(self, points=None,speed = 1):
-        self.vertices = []  # Stores Vertex objects
-        self.half_edges = []  # Stores HalfEdge objects
-        self.faces = []  # Stores Face objects
-        if(points is not None):
-            self.uninserted_points = list(points)  # Points not yet inserted
+    def __init__(self, points=None,speed = 1,record_format = "full",keyframe_interval = 50,record = True,storage = "objects",order = "input",seed = None,legalization = "iterative",location = "buckets",metrics = False,max_frames = None,detail = "step"):
+        if storage not in STORAGE_ENGINES:
+            raise ValueError(f"Unknown storage engine: {storage}")
+        self.storage = storage
+        self.Vertex, self.HalfEdge, self.Face = STORAGE_ENGINES[storage]
+        # Only the object engine keeps the per-vertex incident_edges sets
+        self.track_incident_edges = storage == "objects"
+        self.vertices = Registry()  # Stores Vertex objects
+        self.half_edges = Registry()  # Stores HalfEdge objects
+        self.faces = Registry()  # Stores Face objects
+        self.point_index = {}  # Maps each point to its first position in the input
+        self.point_position = {}  # Maps each point to its row in coords
+        if isinstance(points, np.ndarray):
+            # Arrays, e.g. memory-mapped files, are taken as coords without the loop below
+            points = np.asarray(points, dtype=float).reshape(-1, 2)
+            self.input_points = list(map(tuple, points.tolist()))
+            self.point_index = dict(zip(self.input_points, range(len(points))))
+            if len(self.point_index) == len(points):
+                self.coords = points
+                self.point_position = dict(self.point_index)
+            else:
+                # Keep the first row of every point: the sort is stable, so it leads its run
+                rows = np.lexsort((points[:, 1], points[:, 0]))
+                repeated = np.zeros(len(points), dtype=bool)
+                repeated[1:] = (points[rows[1:]] == points[rows[:-1]]).all(axis=1)
+                first = np.sort(rows[~repeated])
+                self.coords = points[first]
+                self.input_points = [self.input_points[i] for i in first.tolist()]
+                self.point_index = dict(zip(self.input_points, first.tolist()))
+                self.point_position = dict(zip(self.input_points, range(len(first))))
+            self.insertion_order = insertion_order(self.coords, order, seed)
+        elif(points is not None):
+            for i, point in enumerate(points):
+                if point not in self.point_index:
+                    self.point_index[point] = i
+                    self.point_position[point] = len(self.point_position)
+            self.input_points = list(self.point_index)  # Unique points, one per row of coords
+            self.coords = np.array(self.input_points, dtype=float).reshape(-1, 2)
+            # Points are inserted in this order; everything from next_insertion on is uninserted
+            self.insertion_order = insertion_order(self.coords, order, seed)
         else:
-            self.uninserted_points = None
-        self.point_triangle_map = {}  # Maps points to containing triangles
-        self.triangle_point_map = {}  # Maps triangles to points inside
+            self.input_points = []
+            self.coords = np.zeros((0, 2))
+            self.insertion_order = []
+        self.next_insertion = 0
+        # Index given to the next point added with insert()
+        self.next_point_index = len(points) if points is not None else 0
+        self.last_vertex = None  # Most recently inserted vertex, where locate() starts walking
+        # "iterative" legalizes with a work stack of the edges opposite the new point,
+        # "recursive" is the original flip_edge recursion over all edges of the new triangles
+        if legalization not in ("iterative", "recursive"):
+            raise ValueError(f"Unknown legalization: {legalization}")
+        self.legalization = legalization
+        # "buckets" keeps every uninserted point in a bucket of its containing triangle,
+        # "walk" finds the triangle by walking from the last inserted vertex and "jump"
+        # walks from the last vertex inserted near the point, see locate()
+        if location not in LOCATION_STRATEGIES:
+            raise ValueError(f"Unknown location strategy: {location}")
+        self.location = location
+        self.walk_steps = 0  # Faces visited by locate()
+        self.hint_levels = None
+        if location == "jump" and len(self.coords):
+            # A pyramid of grids over the points, the finest with about four points per
+            # cell and each coarser one with half the cells per side
+            self.hint_bits = int(math.log2(max(1.0, math.sqrt(len(self.coords) / 4))))
+            size = 1 << self.hint_bits
+            self.hint_low = self.coords.min(axis=0).tolist()
+            extent = (self.coords.max(axis=0) - self.coords.min(axis=0)).tolist()
+            self.hint_scale = [size / i if i > 0 else 0.0 for i in extent]
+            self.hint_levels = [[None] * (1 << 2 * (self.hint_bits - k)) for k in range(self.hint_bits + 1)]
+        self.flip_count = 0
+        self.in_circle_count = 0
+        self.bucket_moves = 0  # Uninserted points assigned to a new bucket
+        self.insertion_stats = []  # (flips, in-circle tests) for every inserted point
+        # With metrics on, the time spent in the hot methods below is added up in
+        # timings. The methods are only wrapped then, so it costs nothing when off
+        self.metrics = metrics
+        self.timings = {}
+        if metrics:
+            for name, phase in (("update_plot", "update_plot"), ("locate", "locate"), ("updateBuckets", "buckets"),
+                                ("updateBucketsForFlip", "buckets"), ("updateBucketsForEdgeSplit", "buckets")):
+                setattr(self, name, self.timed(getattr(self, name), phase))
+        self.point_triangle_map = None  # Containing triangle of each uninserted point, indexed by row of coords
+        self.triangle_point_map = {}  # Maps triangles to an array of the coords rows inside
         self.curFaceID = 1
         self.curEdgeID = 1
         self.curVertexID = 1
@@ -79,11 +397,165 @@ class Triangulation:
         self.updates = 0
         self.speed = speed
         self.supertriangle_edges = []
+        # "full" stores a complete snapshot per step, "delta" only stores what changed
+        # since the previous step plus a full keyframe every keyframe_interval steps
+        if record_format not in ("full", "delta"):
+            raise ValueError(f"Unknown record format: {record_format}")
+        self.record_format = record_format
+        if keyframe_interval < 1:
+            raise ValueError("keyframe_interval must be at least 1")
+        self.keyframe_interval = keyframe_interval
+        # With recording off no steps, snapshots or circles are computed at all
+        self.recording = record
+        # Level of detail of iter_delaunay's recording. "step" records every change and
+        # circle test, "insertion" one frame per inserted point and max_frames at most
+        # that many frames. Frames merge the changes since the previous frame and show
+        # the circles tested by the insertion that ends them.
+        # frame_insertions is None for every step, otherwise the insertions per frame
+        # (0 for only the first and last frame)
+        if detail not in ("step", "insertion"):
+            raise ValueError(f"Unknown detail: {detail}")
+        self.frame_insertions = None
+        if max_frames is not None:
+            if max_frames < 2:
+                raise ValueError("max_frames must be at least 2")
+            # Besides the frames every frame_insertions insertions there is the first
+            # and the last frame
+            if max_frames > 2:
+                self.frame_insertions = max(1, math.ceil(len(self.insertion_order) / (max_frames - 2)))
+            else:
+                self.frame_insertions = 0
+        elif detail == "insertion":
+            self.frame_insertions = 1
+        self.record_circles = record and self.frame_insertions is None
+        self.frame_circles = []
+        # Undirected edges currently in the triangulation keyed by their vertex id pair.
+        # The xor of the key hashes lets update_plot fingerprint a step in constant time
+        self.edge_index = {}
+        self.edge_hash = 0
+        self.seen_steps = set()  # Fingerprints recorded since the vertices last changed
+        self.recorded_steps = 0
+        # Changes since the last recorded step, only used for the delta format
+        self.pending_added = {}
+        self.pending_removed = {}
+        self.pending_inserted = []
+        self.pending_deleted = []
+        # Incremented whenever a vertex is inserted or removed
+        self.vertex_version = 0
+        self.recorded_version = 0
 
-    def update_plot(self,circle = None,last=False):
-        new_step = {}
+    def timed(self, method, phase):
+        """Wraps a bound method so that its run time is added to timings[phase]."""
+        timings = self.timings
+        timings.setdefault(phase, 0.0)
+
+        def timed_method(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                timings[phase] += time.perf_counter() - start
+        return timed_method
+
+    def stats(self):
+        """Counters of the work done so far, plus the timings if metrics are on."""
+        return {
+            "insertions": len(self.insertion_stats),
+            "flips": self.flip_count,
+            "in_circle_tests": self.in_circle_count,
+            "bucket_moves": self.bucket_moves,
+            "walk_steps": self.walk_steps,
+            "steps": self.recorded_steps,
+            "seconds": dict(self.timings),
+        }
+
+    @property
+    def uninserted_points(self):
+        """Points not yet inserted, in insertion order."""
+        return [self.input_points[i] for i in self.insertion_order[self.next_insertion:]]
+
+    def edge_key(self, v1, v2):
+        if v1.id < v2.id:
+            return (v1.id, v2.id)
+        return (v2.id, v1.id)
+
+    def add_edge(self, v1, v2):
+        """Adds the undirected edge v1-v2 to the edge index."""
+        if not self.recording:
+            return
+        key = self.edge_key(v1, v2)
+        edge = set([(v1.x,v1.y),(v2.x,v2.y)])
+        self.edge_index[key] = edge
+        self.edge_hash ^= hash(key)
+        if key in self.pending_removed:
+            self.pending_removed.pop(key)
+        else:
+            self.pending_added[key] = edge
+
+    def remove_edge(self, v1, v2):
+        """Removes the undirected edge v1-v2 from the edge index."""
+        if not self.recording:
+            return
+        key = self.edge_key(v1, v2)
+        edge = self.edge_index.pop(key)
+        self.edge_hash ^= hash(key)
+        if key in self.pending_added:
+            self.pending_added.pop(key)
+        else:
+            self.pending_removed[key] = edge
+
+    def update_plot(self,circle = None,last=False,frame=False):
+        if not self.recording:
+            return
+        if self.frame_insertions is not None and not (frame or last or self.recorded_steps == 0):
+            # Between frames the changes stay pending and are merged into the next frame
+            if circle is not None:
+                self.frame_circles.append(circle)
+            return
         #new_step["step"] = self.updates
         self.updates = self.updates + 1
+        if self.frame_circles:
+            circles = self.frame_circles
+            self.frame_circles = []
+            circle = tuple(circles)
+        elif circle is not None:
+            circles = [circle]
+        else:
+            circles = []
+        # Inserted and uninserted points are fully determined by the vertex version
+        fingerprint = (self.vertex_version, len(self.edge_index), self.edge_hash, circle)
+        if fingerprint in self.seen_steps and not last:
+            return
+        if self.vertex_version != self.recorded_version:
+            # Steps with other vertices can never match again
+            self.seen_steps.clear()
+        self.seen_steps.add(fingerprint)
+        self.recorded_steps += 1
+        if self.record_format == "full":
+            self.record.append(self.snapshot(circles))
+        elif self.recorded_steps == 1 or last or (self.recorded_steps - 1) % self.keyframe_interval == 0:
+            new_step = self.snapshot(circles)
+            new_step["keyframe"] = True
+            self.record.append(new_step)
+        else:
+            new_step = {}
+            new_step["keyframe"] = False
+            new_step["inserted"] = self.pending_inserted
+            if self.pending_deleted:
+                new_step["removed"] = self.pending_deleted
+            new_step["added_edges"] = list(self.pending_added.values())
+            new_step["removed_edges"] = list(self.pending_removed.values())
+            new_step["circle"] = circles
+            self.record.append(new_step)
+        self.pending_added = {}
+        self.pending_removed = {}
+        self.pending_inserted = []
+        self.pending_deleted = []
+        self.recorded_version = self.vertex_version
+
+    def snapshot(self, circles):
+        """Returns the complete current state as a step."""
+        new_step = {}
         inserted_points = []
         for i in self.vertices:
             inserted_points.append((i.x,i.y))
@@ -92,79 +564,73 @@ class Triangulation:
         for i in self.uninserted_points:
             uninserted.append(i)
         new_step["uninserted"] = uninserted
-        edges = []
-        edges.extend(self.supertriangle_edges)
-        for i in self.half_edges:
-            if i.twin:
-                cur_edge = set()
-                cur_edge.add((i.origin.x,i.origin.y))
-                cur_edge.add((i.twin.origin.x,i.twin.origin.y))
-                if cur_edge not in edges:
-                    edges.append(cur_edge)
-        new_step["edges"] = edges
-        if circle is not None:
-            new_step["circle"] = [circle]
-        else:
-            new_step["circle"] = []
-        if new_step not in self.record or last:
-            self.record.append(new_step)
+        new_step["edges"] = list(self.edge_index.values())
+        new_step["circle"] = circles
+        return new_step
         
 
-    def create_supertriangle(self):
-        """Creates a supertriangle large enough to contain all points."""
-        min_x = min(p[0] for p in self.uninserted_points)
-        max_x = max(p[0] for p in self.uninserted_points)
-        min_y = min(p[1] for p in self.uninserted_points)
-        max_y = max(p[1] for p in self.uninserted_points)
+    def create_supertriangle(self, bounds=None):
+        """Creates a supertriangle large enough to contain all points, or every point of
+        the (min_x, min_y, max_x, max_y) rectangle bounds if it is given."""
+        if bounds is None and len(self.coords) == 0:
+            # Without points any triangle will do, so empty requests get empty results
+            bounds = (0.0, 0.0, 0.0, 0.0)
+        if bounds is None:
+            min_x, min_y = self.coords.min(axis=0).tolist()
+            max_x, max_y = self.coords.max(axis=0).tolist()
+        else:
+            min_x, min_y, max_x, max_y = bounds
 
         dx, dy = max_x - min_x, max_y - min_y
-        delta_max = max(dx, dy) *1.1
+        # A single point still needs a proper triangle around it
+        delta_max = (max(dx, dy) or 1.0) *1.1
 
-        v2 = self.insert_point(round(min_x - delta_max,2), round(max_y + delta_max/2,2))
-        v1 = self.insert_point(round(max_x + delta_max,2), round(max_y + delta_max/2,2))
-        v3 = self.insert_point(round((min_x + max_x) / 2,2), round(min_y - delta_max,2))
+        # The corners are not rounded: rounding could move an edge onto a point
+        v2 = self.insert_point(min_x - delta_max, max_y + delta_max/2)
+        v1 = self.insert_point(max_x + delta_max, max_y + delta_max/2)
+        v3 = self.insert_point((min_x + max_x) / 2, min_y - delta_max)
 
-        self.insert_triangle(v1, v2, v3)
+        supertriangle = self.insert_triangle(v1, v2, v3)
         edge1 = set([(v1.x,v1.y),(v2.x,v2.y)])
         edge2 = set([(v1.x,v1.y),(v3.x,v3.y)])
         edge3 = set([(v2.x,v2.y),(v3.x,v3.y)])
         self.supertriangle_edges.extend([edge1,edge2,edge3])
+        self.add_edge(v1, v2)
+        self.add_edge(v1, v3)
+        self.add_edge(v2, v3)
         # Assign all uninserted points to this supertriangle
-        supertriangle = self.faces[0]
-        pointsInTriangle = set()
-        for point in self.uninserted_points:
-            self.point_triangle_map[point] = supertriangle
-            pointsInTriangle.add(point)
-        #Map triangle to all points
-        self.triangle_point_map[supertriangle] = pointsInTriangle
+        if self.location == "buckets":
+            self.point_triangle_map = np.empty(len(self.coords), dtype=object)
+            self.assign_bucket(supertriangle, np.arange(len(self.coords)))
         self.update_plot()
 
 
     def insert_point(self, x, y):
         """Inserts a new vertex into the triangulation."""
-        vertex = Vertex(x, y)
+        vertex = self.Vertex(x, y, self.curVertexID)
+        self.curVertexID += 1
         self.vertices.append(vertex)
+        self.vertex_version += 1
+        if self.recording:
+            self.pending_inserted.append((x, y))
         return vertex
 
 
     def insert_triangle(self, v1, v2, v3):
         """Inserts a new triangle into the DCEL."""
-        e1 = HalfEdge(self.curEdgeID)
+        e1 = self.HalfEdge(self.curEdgeID)
         self.curEdgeID += 1
-        e2 = HalfEdge(self.curEdgeID)
+        e2 = self.HalfEdge(self.curEdgeID)
         self.curEdgeID += 1
-        e3 = HalfEdge(self.curEdgeID)
+        e3 = self.HalfEdge(self.curEdgeID)
         self.curEdgeID += 1
         e1.origin, e2.origin, e3.origin = v1, v2, v3
         e1.next, e2.next, e3.next = e2, e3, e1
         e1.prev, e2.prev, e3.prev = e3, e1, e2
         #print("For vertices",v1, v2, v3,"\nEdge 1: ",e1,"\nEdge 2: ",e2,"\nEdge 3: ",e3,"\n")
-        # Add the new edges to the incident_edges set of the vertices
-        v1.incident_edges.add(e1)
-        v2.incident_edges.add(e2)
-        v3.incident_edges.add(e3)
+        self.add_incident_edges(e1, e2, e3)
 
-        face = Face(self.curFaceID)
+        face = self.Face(self.curFaceID)
         self.curFaceID += 1
         face.outer_component = e1
         e1.face = e2.face = e3.face = face
@@ -174,31 +640,35 @@ class Triangulation:
         
 
         return face
-    def insert_new_triangle(self, v1, v2, v3):
-        """Inserts a new triangle into the DCEL."""
-        e1Existed = False
-        e1 = None
-        for i in v1.incident_edges:
-            if i.next.origin == v2:
-                e1 = i
-                e1Existed = True
+    def add_incident_edges(self, *edges):
+        """Records each half-edge as outgoing from its origin vertex."""
+        for e in edges:
+            e.origin.incident_edge = e
+            if self.track_incident_edges:
+                e.origin.incident_edges.add(e)
+    def insert_new_triangle(self, v1, v2, v3, e1=None):
+        """Inserts a new triangle into the DCEL. e1 is the existing half-edge from v1 to v2
+        if the caller already knows it, otherwise it is looked up in v1.incident_edges."""
+        e1Existed = e1 is not None
+        if e1 is None and self.track_incident_edges:
+            for i in v1.incident_edges:
+                if i.next.origin == v2:
+                    e1 = i
+                    e1Existed = True
         if e1 is None:
-            e1 = HalfEdge(self.curEdgeID)
+            e1 = self.HalfEdge(self.curEdgeID)
             self.curEdgeID += 1
-        e2 = HalfEdge(self.curEdgeID)
+        e2 = self.HalfEdge(self.curEdgeID)
         self.curEdgeID += 1
-        e3 = HalfEdge(self.curEdgeID)
+        e3 = self.HalfEdge(self.curEdgeID)
         self.curEdgeID += 1
         e1.origin, e2.origin, e3.origin = v1, v2, v3
         e1.next, e2.next, e3.next = e2, e3, e1
         e1.prev, e2.prev, e3.prev = e3, e1, e2
 
-        # Add the new edges to the incident_edges set of the vertices
-        v1.incident_edges.add(e1)
-        v2.incident_edges.add(e2)
-        v3.incident_edges.add(e3)
+        self.add_incident_edges(e1, e2, e3)
 
-        face = Face(self.curFaceID)
+        face = self.Face(self.curFaceID)
         self.curFaceID += 1
         face.outer_component = e1
         e1.face = e2.face = e3.face = face
@@ -231,74 +701,71 @@ class Triangulation:
         e22.twin = e33
         e33.twin = e22
     def find_containing_triangle(self, point):
-        return self.point_triangle_map[point]
-    
+        return self.point_triangle_map[self.point_position[point]]
+
+    def assign_bucket(self, face, pointsInTriangle):
+        """Maps face to the coords rows in pointsInTriangle and each of those rows to face."""
+        if len(pointsInTriangle) == 0:
+            return
+        self.bucket_moves += len(pointsInTriangle)
+        self.triangle_point_map[face] = pointsInTriangle
+        self.point_triangle_map[pointsInTriangle] = face
+
+    def orient_many(self, a, b, pointsOfInterest):
+        """Orientation of every coords row in pointsOfInterest relative to the line a->b,
+        positive on the left."""
+        qx = self.coords[pointsOfInterest, 0]
+        qy = self.coords[pointsOfInterest, 1]
+        return predicates.orient2d_many(a.x, a.y, b.x, b.y, qx, qy)
+
     def updateBuckets(self, face, point, t1, t2, t3):
-        pointsOfInterest = self.triangle_point_map.get(face)
-        pointsOfInterest.remove(point)
-        if(t1 not in self.triangle_point_map):
-            pointSet = set()      
-            self.triangle_point_map[t1] = pointSet
-        if(t2 not in self.triangle_point_map):
-            pointSet = set()      
-            self.triangle_point_map[t2] = pointSet
-        if(t3 not in self.triangle_point_map):
-            pointSet = set()      
-            self.triangle_point_map[t3] = pointSet
-        for i in pointsOfInterest:
-            if self.point_triangle_map[i] in self.faces:
-                continue
-            if(self.is_point_in_triangle(i,t1)):
-                self.point_triangle_map[i] = t1
-                pointSet = self.triangle_point_map[t1]
-                pointSet.add(i)
-                self.triangle_point_map[t1] = pointSet
-            elif(self.is_point_in_triangle(i,t2)):
-                self.point_triangle_map[i] = t2
-                pointSet = self.triangle_point_map[t2]
-                pointSet.add(i)
-                self.triangle_point_map[t2] = pointSet
-            elif(self.is_point_in_triangle(i,t3)):
-                self.point_triangle_map[i] = t3
-                pointSet = self.triangle_point_map[t3]
-                pointSet.add(i)
-                self.triangle_point_map[t3] = pointSet
+        """Moves the points bucketed in face into t1, t2 and t3, which split face around
+        the new vertex p. Each new triangle is the wedge between two spokes from p, so
+        three batched orientation tests classify every point."""
+        pointsOfInterest = self.triangle_point_map.pop(face, None)
+        if pointsOfInterest is None:
+            return
+        pointsOfInterest = pointsOfInterest[pointsOfInterest != self.point_position.get(point, -1)]
+        p = t1.outer_component.prev.origin
+        left1 = self.orient_many(p, t1.outer_component.origin, pointsOfInterest) >= 0
+        left2 = self.orient_many(p, t2.outer_component.origin, pointsOfInterest) >= 0
+        left3 = self.orient_many(p, t3.outer_component.origin, pointsOfInterest) >= 0
+        in_t1 = left1 & ~left2
+        in_t2 = ~in_t1 & left2 & ~left3
+        in_t3 = ~(in_t1 | in_t2)
+        self.assign_bucket(t1, pointsOfInterest[in_t1])
+        self.assign_bucket(t2, pointsOfInterest[in_t2])
+        self.assign_bucket(t3, pointsOfInterest[in_t3])
 
     def updateBucketsForFlip(self, face1, face2, t1, t2):
-        if(t1 not in self.triangle_point_map):
-            pointSet = set()      
-            self.triangle_point_map[t1] = pointSet
-        if(t2 not in self.triangle_point_map):
-            pointSet = set()      
-            self.triangle_point_map[t2] = pointSet
-        pointsOfInterest = self.triangle_point_map.get(face1)
-        for i in pointsOfInterest:
-            if self.point_triangle_map[i] in self.faces:
-                continue
-            if(self.is_point_in_triangle(i,t1)):
-                self.point_triangle_map[i] = t1
-                pointSet = self.triangle_point_map[t1]
-                pointSet.add(i)
-                self.triangle_point_map[t1] = pointSet
-            elif(self.is_point_in_triangle(i,t2)):
-                self.point_triangle_map[i] = t2
-                pointSet = self.triangle_point_map[t2]
-                pointSet.add(i)
-                self.triangle_point_map[t2] = pointSet
-        pointsOfInterest = self.triangle_point_map.get(face2)
-        for i in pointsOfInterest:
-            if self.point_triangle_map[i] in self.faces:
-                continue
-            if(self.is_point_in_triangle(i,t1)):
-                self.point_triangle_map[i] = t1
-                pointSet = self.triangle_point_map[t1]
-                pointSet.add(i)
-                self.triangle_point_map[t1] = pointSet
-            elif(self.is_point_in_triangle(i,t2)):
-                self.point_triangle_map[i] = t2
-                pointSet = self.triangle_point_map[t2]
-                pointSet.add(i)
-                self.triangle_point_map[t2] = pointSet
+        """Moves the points bucketed in face1 and face2 into t1 and t2. The flipped edge
+        separates t1 (on its left) from t2, so one orientation test classifies each point."""
+        buckets = [i for i in (self.triangle_point_map.pop(face1, None), self.triangle_point_map.pop(face2, None)) if i is not None]
+        if not buckets:
+            return
+        pointsOfInterest = np.concatenate(buckets)
+        edge = t1.outer_component
+        in_t1 = self.orient_many(edge.origin, edge.next.origin, pointsOfInterest) >= 0
+        self.assign_bucket(t1, pointsOfInterest[in_t1])
+        self.assign_bucket(t2, pointsOfInterest[~in_t1])
+    def updateBucketsForEdgeSplit(self, face1, face2, point, t1, t2, t3, t4):
+        """Moves the points bucketed in face1 and face2, which shared the edge a->b that
+        point split, into t1 = (p, c, a) and t2 = (p, b, c) on face1's side and
+        t3 = (p, d, b) and t4 = (p, a, d) on face2's side."""
+        buckets = [i for i in (self.triangle_point_map.pop(face1, None), self.triangle_point_map.pop(face2, None)) if i is not None]
+        if not buckets:
+            return
+        pointsOfInterest = np.concatenate(buckets)
+        pointsOfInterest = pointsOfInterest[pointsOfInterest != self.point_position.get(point, -1)]
+        p, c, a = t1.outer_component.origin, t1.outer_component.next.origin, t1.outer_component.prev.origin
+        d = t3.outer_component.next.origin
+        side1 = self.orient_many(a, p, pointsOfInterest) >= 0
+        left_c = self.orient_many(p, c, pointsOfInterest) >= 0
+        left_d = self.orient_many(p, d, pointsOfInterest) >= 0
+        self.assign_bucket(t1, pointsOfInterest[side1 & left_c])
+        self.assign_bucket(t2, pointsOfInterest[side1 & ~left_c])
+        self.assign_bucket(t3, pointsOfInterest[~side1 & left_d])
+        self.assign_bucket(t4, pointsOfInterest[~side1 & ~left_d])
     def is_point_in_triangle(self, point, face):
         """Check if a point is inside a given triangle."""
         v1 = face.outer_component.origin
@@ -306,10 +773,11 @@ class Triangulation:
         v3 = face.outer_component.next.next.origin
         return self.is_inside_triangle(point, v1, v2, v3)
     def flip_edge(self, edge):
-        """Flips an edge if it violates the Delaunay condition and removes old edges."""
+        """Flips an edge if it violates the Delaunay condition and removes old edges.
+        Returns True if the edge was flipped."""
         twin = edge.twin
         if twin is None or twin.face is None:
-            return  # True boundary edge (can't flip)
+            return False  # True boundary edge (can't flip)
 
         # Get the four vertices involved in the flip
         a = edge.origin
@@ -319,7 +787,7 @@ class Triangulation:
 
         # Check the in-circle condition before flipping
         if not self.in_circle(a, b, c, d):
-            return  # No flip needed
+            return False  # No flip needed
         #self.update_plot()
         #plot_triangulation(self)
         face1 = edge.face
@@ -332,8 +800,12 @@ class Triangulation:
         ca = edge.prev
         ad = twin.next
         db = twin.prev
-        a.incident_edges.remove(edge)
-        b.incident_edges.remove(twin)
+        if self.track_incident_edges:
+            a.incident_edges.remove(edge)
+            b.incident_edges.remove(twin)
+        # a and b keep the outgoing edges ad and bc
+        a.incident_edge = ad
+        b.incident_edge = bc
         # Reconnect the new edges to each other
         #correct edge db
         twin.prev.prev = edge
@@ -355,13 +827,14 @@ class Triangulation:
         edge.prev = bc
         
         #Add incident edges
-        c.incident_edges.add(edge)
-        d.incident_edges.add(twin)
+        self.add_incident_edges(edge, twin)
+        self.remove_edge(a, b)
+        self.add_edge(c, d)
         
         # Create new faces after the flip
-        new_face1 = Face(self.curFaceID)
+        new_face1 = self.Face(self.curFaceID)
         self.curFaceID += 1
-        new_face2 = Face(self.curFaceID)
+        new_face2 = self.Face(self.curFaceID)
         self.curFaceID += 1
         new_face1.outer_component = edge
         new_face2.outer_component = twin
@@ -376,96 +849,474 @@ class Triangulation:
         # Add the new faces to the structure
         self.faces.append(new_face1)
         self.faces.append(new_face2)
+        self.flip_count += 1
         self.update_plot()
-        # Recurse on the neighboring edges
-        self.flip_edge(edge.next)
-        self.flip_edge(edge.prev)
-        self.flip_edge(twin.next)
-        self.flip_edge(twin.prev)
+        if self.legalization == "recursive":
+            # Recurse on the neighboring edges
+            self.flip_edge(edge.next)
+            self.flip_edge(edge.prev)
+            self.flip_edge(twin.next)
+            self.flip_edge(twin.prev)
         #print("\nFlipped an EDGE!!!!\n")
+        return True
+    def legalize(self, edges):
+        """Lawson legalization driven by an explicit stack. Every edge on the stack lies
+        opposite the newly inserted point in its face; when one is flipped the new edge
+        ends at that point and only the two edges across from it can become illegal."""
+        stack = list(edges)
+        while stack:
+            edge = stack.pop()
+            if self.flip_edge(edge):
+                # After the flip edge runs from the new point to the opposite vertex d
+                stack.append(edge.twin.prev)
+                stack.append(edge.next)
     def circumcenter(self,ax,ay,bx,by,cx,cy):
-        d = 2 * (ax * (by - cy) + bx * (cy - ay) + cx * (ay - by))
-        ux = ((ax * ax + ay * ay) * (by - cy) + (bx * bx + by * by) * (cy - ay) + (cx * cx + cy * cy) * (ay - by)) / d
-        uy = ((ax * ax + ay * ay) * (cx - bx) + (bx * bx + by * by) * (ax - cx) + (cx * cx + cy * cy) * (bx - ax)) / d
-        return (round(ux,2), round(uy,2))
+        # Only used to draw circles, so rounding it does not affect the predicates.
+        # Working relative to a avoids cancellation for thin triangles far from the origin
+        bx, by, cx, cy = bx - ax, by - ay, cx - ax, cy - ay
+        d = 2 * (bx * cy - by * cx)
+        if d == 0:
+            return None
+        ux = (cy * (bx * bx + by * by) - by * (cx * cx + cy * cy)) / d
+        uy = (bx * (cx * cx + cy * cy) - cx * (bx * bx + by * by)) / d
+        return (round(ax + ux,2), round(ay + uy,2))
+    def circle(self, a, b, c):
+        """The circumcircle of triangle (a, b, c) as drawn in a step, None if it is too
+        thin for its circumcircle to be computed."""
+        center = self.circumcenter(a.x,a.y,b.x,b.y,c.x,c.y)
+        if center is None:
+            return None
+        center_x, center_y = center
+        return (center_x,center_y,round(math.dist((a.x,a.y),(center_x,center_y)),0))
     def in_circle(self, a, b, c, d):
         """Returns True if point d is inside the circumcircle of triangle (a, b, c)."""
-        ax, ay = a.x, a.y
-        bx, by = b.x, b.y
-        cx, cy = c.x, c.y
-        dx, dy = d.x, d.y
-        center_x, center_y = self.circumcenter(ax,ay,bx,by,cx,cy)
-        self.update_plot((center_x,center_y,round(math.dist((a.x,a.y),(center_x,center_y)),0)))
-        # Determinant method
-        matrix = [
-            [ax - dx, ay - dy, (ax - dx) ** 2 + (ay - dy) ** 2],
-            [bx - dx, by - dy, (bx - dx) ** 2 + (by - dy) ** 2],
-            [cx - dx, cy - dy, (cx - dx) ** 2 + (cy - dy) ** 2],
-        ]
-
-        det = (matrix[0][0] * (matrix[1][1] * matrix[2][2] - matrix[2][1] * matrix[1][2])
-            - matrix[0][1] * (matrix[1][0] * matrix[2][2] - matrix[2][0] * matrix[1][2])
-            + matrix[0][2] * (matrix[1][0] * matrix[2][1] - matrix[2][0] * matrix[1][1]))
-
-        return det > 0  # If determinant > 0, d is inside the circumcircle
+        self.in_circle_count += 1
+        if self.recording:
+            self.update_plot(self.circle(a, b, c) if self.record_circles else None)
+        return self.incircle(a, b, c, d) > 0  # If determinant > 0, d is inside the circumcircle
+    def incircle(self, a, b, c, d):
+        """Positive if d is inside the circumcircle of the counter-clockwise triangle
+        (a, b, c), negative if outside and zero if the four points are cocircular."""
+        return predicates.incircle(a.x, a.y, b.x, b.y, c.x, c.y, d.x, d.y)
+    def orient(self, a, b, c):
+        """Positive if c is left of the line a->b, negative if right, zero if collinear."""
+        return predicates.orient2d(a.x, a.y, b.x, b.y, c.x, c.y)
 
     def is_inside_triangle(self, p, a, b, c):
-        """Barycentric method to check if a point is inside a triangle."""
-        def sign(p1, p2, p3):
-            return (p1[0] - p3[0]) * (p2[1] - p3[1]) - (p2[0] - p3[0]) * (p1[1] - p3[1])
-
-        d1 = sign(p, (a.x, a.y), (b.x, b.y))
-        d2 = sign(p, (b.x, b.y), (c.x, c.y))
-        d3 = sign(p, (c.x, c.y), (a.x, a.y))
+        """Checks that p is on the same side of all three edges, boundary included."""
+        px, py = p
+        d1 = predicates.orient2d(a.x, a.y, b.x, b.y, px, py)
+        d2 = predicates.orient2d(b.x, b.y, c.x, c.y, px, py)
+        d3 = predicates.orient2d(c.x, c.y, a.x, a.y, px, py)
 
         has_neg = (d1 < 0) or (d2 < 0) or (d3 < 0)
         has_pos = (d1 > 0) or (d2 > 0) or (d3 > 0)
 
         return not (has_neg and has_pos)
 
-    def retriangulate(self, point):
+    def retriangulate(self, point, triangle=None):
         
         #print(self.point_triangle_map)
-        """Performs local retriangulation after inserting a point."""
-        triangle = self.find_containing_triangle(point)
+        """Performs local retriangulation after inserting a point. triangle is the face
+        containing point if the caller already located it."""
+        if triangle is None:
+            triangle = self.find_containing_triangle(point)
         if not triangle:
             print(f"Error: No containing triangle found for {point}")
             return
+        # A point on an edge would leave a triangle of zero area, split both sides instead
+        e = triangle.outer_component
+        for edge in (e, e.next, e.prev):
+            if edge.twin is not None and predicates.orient2d(edge.origin.x, edge.origin.y, edge.next.origin.x, edge.next.origin.y, point[0], point[1]) == 0:
+                self.split_edge(edge, point)
+                return
         
         # Remove the old triangle and insert 3 new ones
         self.faces.remove(triangle)
         self.Tricount -= 1
-
-        #Remove point from point map since it's not uninserted
-        self.point_triangle_map.pop(point)
-        
-        v1 = triangle.outer_component.origin
-        v2 = triangle.outer_component.next.origin
-        v3 = triangle.outer_component.prev.origin
-        p_vertex = self.insert_point(point[0], point[1])
         
+        e12 = triangle.outer_component
+        e23 = e12.next
+        e31 = e12.prev
+        v1 = e12.origin
+        v2 = e23.origin
+        v3 = e31.origin
+        p_vertex = self.new_vertex(point)
 
-        t1 = self.insert_new_triangle(v1, v2, p_vertex)
-        t2 = self.insert_new_triangle(v2, v3, p_vertex)
-        t3 = self.insert_new_triangle(v3, v1, p_vertex)
+        # The sides of the old triangle are reused by the new ones
+        t1 = self.insert_new_triangle(v1, v2, p_vertex, e12)
+        t2 = self.insert_new_triangle(v2, v3, p_vertex, e23)
+        t3 = self.insert_new_triangle(v3, v1, p_vertex, e31)
         self.linkTriangles(t1,t2,t3)
+        self.add_edge(v1, p_vertex)
+        self.add_edge(v2, p_vertex)
+        self.add_edge(v3, p_vertex)
         self.updateBuckets(triangle, point, t1, t2, t3)
-        self.triangle_point_map.pop(triangle)
         self.update_plot()
         # Flip edges if necessary
-        for tri in [t1, t2, t3]:
-            for edge in [tri.outer_component, tri.outer_component.next, tri.outer_component.prev]:
+        flips, tests = self.flip_count, self.in_circle_count
+        if self.legalization == "iterative":
+            self.legalize([e12, e23, e31])
+        else:
+            for tri in [t1, t2, t3]:
+                for edge in [tri.outer_component, tri.outer_component.next, tri.outer_component.prev]:
+                    self.flip_edge(edge)
+        self.insertion_stats.append((self.flip_count - flips, self.in_circle_count - tests))
+
+    def new_vertex(self, point):
+        """Creates the vertex for an inserted point and takes the point out of the
+        uninserted bookkeeping."""
+        #Remove point from point map since it's not uninserted
+        position = self.point_position.get(point)
+        if position is not None and self.point_triangle_map is not None:
+            self.point_triangle_map[position] = None
+        p_vertex = self.insert_point(point[0], point[1])
+        p_vertex.index = self.point_index[point]
+        self.last_vertex = p_vertex
+        if self.hint_levels is not None:
+            i, j = self.hint_cell(point)
+            for k, cells in enumerate(self.hint_levels):
+                cells[((j >> k) << (self.hint_bits - k)) + (i >> k)] = p_vertex
+        return p_vertex
+
+    def split_edge(self, edge, point):
+        """Inserts point, which lies on edge a->b, by splitting the triangles (a, b, c)
+        and (b, a, d) on both sides of the edge into four."""
+        twin = edge.twin
+        face1, face2 = edge.face, twin.face
+        bc, ca = edge.next, edge.prev
+        ad, db = twin.next, twin.prev
+        a, b, c, d = edge.origin, twin.origin, ca.origin, db.origin
+        self.faces.remove(face1)
+        self.faces.remove(face2)
+        self.Tricount -= 2
+        p = self.new_vertex(point)
+        # edge and twin become a->p and b->p, the other six half-edges are new
+        pc, cp, pb, pd, dp, pa = (self.HalfEdge(self.curEdgeID + i) for i in range(6))
+        self.curEdgeID += 6
+        pc.origin, cp.origin, pb.origin, pd.origin, dp.origin, pa.origin = p, c, p, p, d, p
+        pc.twin, cp.twin = cp, pc
+        pd.twin, dp.twin = dp, pd
+        edge.twin, pa.twin = pa, edge
+        twin.twin, pb.twin = pb, twin
+        self.half_edges.extend([pc, cp, pb, pd, dp, pa])
+        self.Edgecount += 6
+        t1 = self.insert_face(pc, ca, edge)
+        t2 = self.insert_face(pb, bc, cp)
+        t3 = self.insert_face(pd, db, twin)
+        t4 = self.insert_face(pa, ad, dp)
+        self.add_incident_edges(pc, cp, pb, pd, dp, pa)
+        self.remove_edge(a, b)
+        for v in (a, b, c, d):
+            self.add_edge(v, p)
+        self.updateBucketsForEdgeSplit(face1, face2, point, t1, t2, t3, t4)
+        self.update_plot()
+        flips, tests = self.flip_count, self.in_circle_count
+        if self.legalization == "iterative":
+            self.legalize([ca, bc, db, ad])
+        else:
+            for edge in (ca, bc, db, ad):
                 self.flip_edge(edge)
+        self.insertion_stats.append((self.flip_count - flips, self.in_circle_count - tests))
 
+    def hint_cell(self, point):
+        """Column and row of the cell of the finest jump grid that point falls in."""
+        last = (1 << self.hint_bits) - 1
+        i = min(max(int((point[0] - self.hint_low[0]) * self.hint_scale[0]), 0), last)
+        j = min(max(int((point[1] - self.hint_low[1]) * self.hint_scale[1]), 0), last)
+        return i, j
+    def locate(self, point):
+        """Finds the face containing point by walking the DCEL from a nearby vertex,
+        crossing any edge that has point on its right until there is none. With the
+        "jump" strategy the walk starts at the last vertex inserted in the finest jump
+        grid cell of point that has one, otherwise at the last inserted vertex.
+        Returns None if point lies outside the supertriangle."""
+        start = self.last_vertex
+        if self.hint_levels is not None:
+            i, j = self.hint_cell(point)
+            for k, cells in enumerate(self.hint_levels):
+                vertex = cells[((j >> k) << (self.hint_bits - k)) + (i >> k)]
+                if vertex is not None and vertex.alive:
+                    start = vertex
+                    break
+        if start is not None:
+            face = start.incident_edge.face
+        else:
+            face = next(iter(self.faces), None)
+        return self.walk(face, point)
+    def walk(self, face, point):
+        """Walks from face to the face containing point, see locate()."""
+        px, py = point
+        # A walk in a Delaunay triangulation cannot cycle; the bound only guards
+        # against rounding errors on nearly degenerate input
+        for _ in range(len(self.faces) + 1):
+            if face is None:
+                return None
+            self.walk_steps += 1
+            e = face.outer_component
+            for edge in (e, e.next, e.prev):
+                a, b = edge.origin, edge.next.origin
+                if predicates.orient2d(a.x, a.y, b.x, b.y, px, py) < 0:
+                    face = edge.twin.face if edge.twin is not None else None
+                    break
+            else:
+                return face
+        for face in self.faces:
+            if self.is_point_in_triangle(point, face):
+                return face
+        return None
+    def insert(self, point):
+        """Adds point to a finished triangulation and returns the steps recorded for
+        the change. The containing face is found with locate(), so no buckets are needed."""
+        if point in self.point_index:
+            raise ValueError(f"Point {point} is already in the triangulation")
+        triangle = self.locate(point)
+        if triangle is None:
+            raise ValueError(f"Point {point} is outside the supertriangle")
+        self.point_index[point] = self.next_point_index
+        self.next_point_index += 1
+        self.retriangulate(point, triangle)
+        return self.drain_record()
+    def remove(self, point):
+        """Deletes the vertex at point from a finished triangulation, retriangulates the
+        hole left by its star and returns the steps recorded for the change."""
+        vertex = None
+        face = self.locate(point) if point in self.point_index else None
+        if face is not None:
+            for v in (face.outer_component.origin, face.outer_component.next.origin, face.outer_component.prev.origin):
+                if (v.x, v.y) == point and v.index is not None:
+                    vertex = v
+        if vertex is None:
+            raise ValueError(f"Point {point} is not in the triangulation")
+        # Outgoing edges in counter-clockwise order; the edges across from vertex bound the hole
+        spokes = []
+        edge = vertex.incident_edge
+        while True:
+            spokes.append(edge)
+            edge = edge.prev.twin
+            if edge is vertex.incident_edge:
+                break
+        boundary = [edge.next for edge in spokes]
+        for edge in spokes:
+            neighbour = edge.next.origin
+            self.faces.remove(edge.face)
+            self.half_edges.remove(edge)
+            self.half_edges.remove(edge.twin)
+            if self.track_incident_edges:
+                neighbour.incident_edges.discard(edge.twin)
+            self.remove_edge(vertex, neighbour)
+        self.Tricount -= len(spokes)
+        self.Edgecount -= 2 * len(spokes)
+        self.add_incident_edges(*boundary)
+        self.vertices.remove(vertex)
+        self.vertex_version += 1
+        del self.point_index[point]
+        if self.recording:
+            self.pending_deleted.append((vertex.x, vertex.y))
+        if self.last_vertex is vertex:
+            self.last_vertex = boundary[0].origin
+        self.update_plot()
+        self.fill_hole(boundary)
+        return self.drain_record()
+    def fill_hole(self, boundary):
+        """Triangulates the hole bounded by the counter-clockwise cycle of half-edges in
+        boundary by cutting off Delaunay ears: convex corners whose circumcircle holds no
+        other boundary vertex. When the hole is the star of a deleted Delaunay vertex
+        such an ear always exists and the result is Delaunay again."""
+        while len(boundary) > 3:
+            n = len(boundary)
+            ear = None
+            for i in range(n):
+                a, b, c = boundary[i - 1].origin, boundary[i].origin, boundary[(i + 1) % n].origin
+                if self.orient(a, b, c) <= 0:
+                    continue
+                if ear is None:
+                    ear = i  # Fallback if rounding leaves no empty circumcircle
+                if not any(self.incircle(a, b, c, e.origin) > 0 for e in boundary if e.origin not in (a, b, c)):
+                    ear = i
+                    break
+            a, b, c = boundary[ear - 1].origin, boundary[ear].origin, boundary[(ear + 1) % n].origin
+            diagonal = self.HalfEdge(self.curEdgeID)
+            self.curEdgeID += 1
+            outside = self.HalfEdge(self.curEdgeID)
+            self.curEdgeID += 1
+            diagonal.origin, outside.origin = c, a
+            diagonal.twin, outside.twin = outside, diagonal
+            self.half_edges.extend([diagonal, outside])
+            self.Edgecount += 2
+            self.insert_face(boundary[ear - 1], boundary[ear], diagonal)
+            self.add_incident_edges(diagonal, outside)
+            self.add_edge(a, c)
+            self.update_plot(self.circle(a, b, c) if self.record_circles else None)
+            # The new edge a->c replaces a->b and b->c on the boundary
+            boundary[ear] = outside
+            del boundary[ear - 1]
+        self.insert_face(*boundary)
+        self.update_plot()
+    def insert_face(self, e1, e2, e3):
+        """Links three half-edges that already have their origins into a new face."""
+        e1.next, e2.next, e3.next = e2, e3, e1
+        e1.prev, e2.prev, e3.prev = e3, e1, e2
+        face = self.Face(self.curFaceID)
+        self.curFaceID += 1
+        face.outer_component = e1
+        e1.face = e2.face = e3.face = face
+        self.faces.append(face)
+        self.Tricount += 1
+        return face
 
-    def incremental_delaunay(self,getPoints = True):
-        self.create_supertriangle()
+    def incremental_delaunay(self,getPoints = True,should_stop = None):
         """Performs incremental Delaunay triangulation."""
-        while self.uninserted_points:
-            point = self.uninserted_points.pop(0)
-            self.retriangulate(point)
-        self.update_plot(last=True)
+        self.record = list(self.iter_delaunay(should_stop))
         return self.record
+    def iter_delaunay(self, should_stop=None):
+        """Performs incremental Delaunay triangulation, yielding the recorded steps as
+        they are produced. Yielded steps are dropped from self.record so only the steps
+        of the current insertion are held in memory. should_stop is called after every
+        insertion and stops the triangulation with TriangulationCancelled if it returns True."""
+        self.create_supertriangle()
+        yield from self.drain_record()
+        frames = self.recording and bool(self.frame_insertions)
+        while self.next_insertion < len(self.insertion_order):
+            point = self.input_points[self.insertion_order[self.next_insertion]]
+            self.next_insertion += 1
+            if frames:
+                frame = (self.next_insertion % self.frame_insertions == 0
+                         or self.next_insertion == len(self.insertion_order))
+                # Only the circles of the insertion that ends a frame are shown
+                self.record_circles = frame
+            if self.location == "buckets":
+                self.retriangulate(point)
+            else:
+                self.retriangulate(point, self.locate(point))
+            if frames and frame:
+                self.update_plot(frame=True)
+            if should_stop is not None and should_stop():
+                raise TriangulationCancelled()
+            yield from self.drain_record()
+        self.update_plot(last=True)
+        yield from self.drain_record()
+    def drain_record(self):
+        steps = self.record
+        self.record = []
+        return steps
+    def strip_delaunay(self, workers=None, strips=None):
+        """Triangulates the points without recording by splitting them into vertical
+        strips that are triangulated in parallel worker processes and then stitched.
+        A strip triangle whose circumcircle lies strictly inside the strip's slab cannot
+        contain points of other strips, so it is final. Every other Delaunay triangle
+        only uses seam points (points with a non-final or boundary triangle), so the seam
+        points are triangulated again and the seam triangles with empty circumcircles
+        complete the mesh. Cocircular ties are broken by the perturbation of
+        predicates.incircle in the strips, the seam and the emptiness check alike, so
+        they all pick the same diagonals. The result is built into the usual DCEL."""
+        workers = workers or os.cpu_count() or 1
+        strips = strips or workers
+        n = len(self.coords)
+        by_x = np.argsort(self.coords[:, 0], kind="stable")
+        parts = [i for i in np.array_split(by_x, strips) if len(i)]
+        if len(parts) < 2 or n < 3 * len(parts):
+            triangles = strip_triangles(self.coords, 0) if n >= 3 else np.zeros((0, 3), dtype=np.int64)
+            self.build_from_triangles(triangles)
+            return
+        args = ([self.coords[i] for i in parts], range(len(parts)))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(parts))) as executor:
+                results = list(executor.map(strip_triangles, *args))
+        else:
+            results = list(map(strip_triangles, *args))
+
+        final = []
+        seam = np.zeros(n, dtype=bool)
+        for k, (rows, local) in enumerate(zip(parts, results)):
+            triangles = rows[local]
+            covered = np.zeros(n, dtype=bool)
+            covered[rows] = True
+            if len(triangles) == 0:
+                seam[rows] = True
+                continue
+            # The slab lies strictly between the neighbouring strips
+            left = self.coords[parts[k - 1], 0].max() if k > 0 else -np.inf
+            right = self.coords[parts[k + 1], 0].min() if k + 1 < len(parts) else np.inf
+            centres, r2 = circumcircles(self.coords, triangles)
+            r = np.sqrt(r2)
+            inside = (centres[:, 0] - r > left) & (centres[:, 0] + r < right)
+            final.append(triangles[inside])
+            seam[triangles[~inside].ravel()] = True
+            # Vertices on the boundary of the strip mesh, or missing from it, are seam points
+            edges = np.sort(np.concatenate([triangles[:, [0, 1]], triangles[:, [1, 2]], triangles[:, [2, 0]]]), axis=1)
+            unique, counts = np.unique(edges, axis=0, return_counts=True)
+            seam[unique[counts == 1].ravel()] = True
+            used = np.zeros(n, dtype=bool)
+            used[triangles.ravel()] = True
+            seam[covered & ~used] = True
+
+        seam_rows = np.flatnonzero(seam)
+        local = strip_triangles(self.coords[seam_rows], len(parts))
+        candidates = seam_rows[local]
+        # Seam triangles are empty of seam points; check the remaining points with a grid
+        grid = PointGrid(self.coords, np.flatnonzero(~seam))
+        centres, r2 = circumcircles(self.coords, candidates)
+        known = set(map(tuple, np.sort(np.concatenate(final), axis=1).tolist())) if final else set()
+        stitched = []
+        for triangle, centre, radius2 in zip(candidates, centres, r2):
+            key = tuple(sorted(triangle.tolist()))
+            if key in known or not np.isfinite(radius2) or grid.any_inside(centre, radius2, triangle):
+                continue
+            known.add(key)
+            stitched.append(triangle)
+        triangles = np.concatenate(final + [np.array(stitched, dtype=np.int64).reshape(-1, 3)])
+        self.build_from_triangles(triangles)
+
+    def build_from_triangles(self, triangles):
+        """Builds the DCEL from an (m, 3) array of coords rows, one Vertex per row."""
+        self.next_insertion = len(self.insertion_order)
+        vertices = []
+        for point in self.input_points:
+            vertex = self.insert_point(point[0], point[1])
+            vertex.index = self.point_index[point]
+            vertices.append(vertex)
+        # Orient every triangle counter-clockwise like the incremental engine does
+        a, b, c = self.coords[triangles[:, 0]], self.coords[triangles[:, 1]], self.coords[triangles[:, 2]]
+        clockwise = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0]) < 0
+        triangles = triangles.copy()
+        triangles[clockwise, 1], triangles[clockwise, 2] = triangles[clockwise, 2], triangles[clockwise, 1].copy()
+        half_edges = {}
+        for i, j, k in triangles.tolist():
+            face = self.insert_triangle(vertices[i], vertices[j], vertices[k])
+            e = face.outer_component
+            for edge in (e, e.next, e.prev):
+                key = (edge.origin.id, edge.next.origin.id)
+                half_edges[key] = edge
+                twin = half_edges.get((key[1], key[0]))
+                if twin is not None:
+                    edge.twin = twin
+                    twin.twin = edge
+        self.Tricount = len(self.faces)
+        self.Edgecount = len(self.half_edges)
+
+    def get_triangles(self):
+        """Returns the final triangles as input point indices, leaving out the supertriangle."""
+        triangles = []
+        for face in self.faces:
+            e = face.outer_component
+            v1, v2, v3 = e.origin, e.next.origin, e.prev.origin
+            if v1.index is None or v2.index is None or v3.index is None:
+                continue
+            triangles.append((v1.index, v2.index, v3.index))
+        return triangles
+    def get_edges(self):
+        """Returns the final edges as input point index pairs, leaving out the supertriangle."""
+        edges = []
+        for e in self.half_edges:
+            a, b = e.origin, e.next.origin
+            if a.index is None or b.index is None:
+                continue
+            # Each edge has two half-edges, only report it once
+            if e.twin is not None and a.id > b.id:
+                continue
+            edges.append((a.index, b.index))
+        return edges
     def print_edges(self):
         """Prints unique edges in the triangulation."""
         printed_edges = set()
@@ -486,20 +1337,35 @@ class Triangulation:
             print(f"Error {len(self.half_edges)} edges, expected {self.Edgecount}\n")
         else:
             print("Yessir\n")
+    def convert_edges(self, edges):
+        converted = []
+        for i in edges:
+            cur_edge = []
+            for j in i:
+                cur_edge.append(j)
+            converted.append(cur_edge)
+        return converted
     def convert_record(self, record):
+        if record.get("keyframe") is False:
+            new_record = {}
+            new_record["keyframe"] = False
+            new_record["inserted_points"] = list(record["inserted"])
+            if "removed" in record:
+                new_record["removed_points"] = list(record["removed"])
+            new_record["added_edges"] = self.convert_edges(record["added_edges"])
+            new_record["removed_edges"] = self.convert_edges(record["removed_edges"])
+            new_record["circles"] = record["circle"]
+            return new_record
         new_record = {}
+        if "keyframe" in record:
+            new_record["keyframe"] = True
         points = []
         for i in record["inserted"]:
             points.append(i)
         uninserted_points = []
         for i in record["uninserted"]:
             uninserted_points.append(i)
-        edges = []
-        for i in record["edges"]:
-            cur_edge = []
-            for j in i:
-                cur_edge.append(j)
-            edges.append(cur_edge)
+        edges = self.convert_edges(record["edges"])
         new_record["points"] = points
         new_record["edges"] = edges
         new_record["uninserted_points"] = uninserted_points
@@ -0,0 +1,117 @@
+'''Compact binary encoding of drawing sequences, the opt-in alternative to the JSON
+returned by /get_drawing_sequence. Every coordinate is stored once in a float32 point
+table and steps refer to points by uint32 index. All values are little-endian and every
+block starts on a 4-byte boundary, so a browser can read the blocks straight into
+typed arrays.
+
+Layout:
+    header    magic b"DTSQ", uint16 version, uint16 reserved, uint32 point count,
+              uint32 step count
+    points    float32 x, y for every point
+    steps     uint32 kind, then uint32 counts of points, uninserted points, edges,
+              removed edges and circles, then the uint32 point indices, the uint32
+              index pairs of the edges and removed edges and float32 x, y, radius
+              for every circle
+
+kind is STEP_FULL for snapshots of the "full" format, STEP_KEYFRAME for keyframes
+and STEP_DELTA for the other steps of the "delta" format. For delta steps the points
+block holds the newly inserted points, the uninserted block the removed points and the
+edges block the added edges.'''
+import struct
+
+import numpy as np
+
+MAGIC = b"DTSQ"
+VERSION = 1
+CONTENT_TYPE = "application/octet-stream"
+
+STEP_FULL = 0
+STEP_KEYFRAME = 1
+STEP_DELTA = 2
+
+HEADER = struct.Struct("<4sHHII")
+STEP_HEADER = struct.Struct("<6I")
+
+
+def encode_sequence(records):
+    """Encodes the records produced by Triangulation.incremental_delaunay."""
+    point_ids = {}
+
+    def point_id(point):
+        index = point_ids.get(point)
+        if index is None:
+            index = point_ids[point] = len(point_ids)
+        return index
+
+    def edge_ids(edges):
+        ids = []
+        for edge in edges:
+            for point in edge:
+                ids.append(point_id(point))
+        return ids
+
+    chunks = []
+    for record in records:
+        keyframe = record.get("keyframe")
+        if keyframe is False:
+            kind = STEP_DELTA
+            points = [point_id(i) for i in record["inserted"]]
+            uninserted = [point_id(i) for i in record.get("removed", [])]
+            edges = edge_ids(record["added_edges"])
+            removed = edge_ids(record["removed_edges"])
+        else:
+            kind = STEP_KEYFRAME if keyframe else STEP_FULL
+            points = [point_id(i) for i in record["inserted"]]
+            uninserted = [point_id(i) for i in record["uninserted"]]
+            edges = edge_ids(record["edges"])
+            removed = []
+        circles = [value for circle in record["circle"] for value in circle]
+        chunks.append(STEP_HEADER.pack(kind, len(points), len(uninserted), len(edges) // 2, len(removed) // 2, len(circles) // 3))
+        chunks.append(np.array(points + uninserted + edges + removed, dtype="<u4").tobytes())
+        chunks.append(np.array(circles, dtype="<f4").tobytes())
+
+    table = np.array(list(point_ids), dtype="<f4").reshape(-1, 2)
+    header = HEADER.pack(MAGIC, VERSION, 0, len(table), len(records))
+    return b"".join([header, table.tobytes()] + chunks)
+
+
+def decode_sequence(data):
+    """Decodes a binary sequence into the same steps convert_record produces."""
+    magic, version, _, point_count, step_count = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a version 1 drawing sequence")
+    offset = HEADER.size
+    table = np.frombuffer(data, dtype="<f4", count=point_count * 2, offset=offset).reshape(-1, 2).tolist()
+    offset += point_count * 8
+    steps = []
+    for _ in range(step_count):
+        kind, n_points, n_uninserted, n_edges, n_removed, n_circles = STEP_HEADER.unpack_from(data, offset)
+        offset += STEP_HEADER.size
+        count = n_points + n_uninserted + 2 * n_edges + 2 * n_removed
+        ids = np.frombuffer(data, dtype="<u4", count=count, offset=offset).tolist()
+        offset += count * 4
+        circles = np.frombuffer(data, dtype="<f4", count=n_circles * 3, offset=offset).reshape(-1, 3).tolist()
+        offset += n_circles * 12
+        points = [table[i] for i in ids[:n_points]]
+        uninserted = [table[i] for i in ids[n_points:n_points + n_uninserted]]
+        start = n_points + n_uninserted
+        edges = [[table[ids[i]], table[ids[i + 1]]] for i in range(start, start + 2 * n_edges, 2)]
+        start += 2 * n_edges
+        removed = [[table[ids[i]], table[ids[i + 1]]] for i in range(start, start + 2 * n_removed, 2)]
+        step = {}
+        if kind == STEP_DELTA:
+            step["keyframe"] = False
+            step["inserted_points"] = points
+            if uninserted:
+                step["removed_points"] = uninserted
+            step["added_edges"] = edges
+            step["removed_edges"] = removed
+        else:
+            if kind == STEP_KEYFRAME:
+                step["keyframe"] = True
+            step["points"] = points
+            step["edges"] = edges
+            step["uninserted_points"] = uninserted
+        step["circles"] = circles
+        steps.append(step)
+    return steps
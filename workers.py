@@ -0,0 +1,297 @@
+'''Runs triangulation jobs for the web app, either inline on the request thread or in a
+pool of worker processes so that large requests neither block a web worker nor compete
+for the GIL. The pool has a bounded number of slots, a per-job timeout and cancels jobs
+whose client has gone away.'''
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import query
+import triangulation as tri
+import wire
+
+
+class PoolSaturated(Exception):
+    """Every worker is busy and the queue of waiting jobs is full."""
+
+
+class JobTimeout(Exception):
+    """The job ran past its deadline and was stopped."""
+
+
+class JobCancelled(Exception):
+    """The job was cancelled, usually because the client disconnected."""
+
+
+# Set TRIANGULATION_METRICS=0 to skip timing the triangulations. The worker processes
+# inherit the setting.
+METRICS = os.environ.get('TRIANGULATION_METRICS', '1') != '0'
+
+
+# Jobs. Each takes a should_stop callback that is passed on to the triangulation. The
+# others return (body, metrics), the streaming job yields its metrics after the lines;
+# metrics are the triangulation's stats() plus the seconds of each phase, or None.
+def job_metrics(triang, **phases):
+    if not METRICS:
+        return None
+    metrics = triang.stats()
+    metrics["seconds"].update(phases)
+    return metrics
+
+
+def json_body(value):
+    """Serializes value the way flask.jsonify does outside debug mode."""
+    return (json.dumps(value, sort_keys=True, separators=(",", ":")) + "\n").encode()
+
+
+def drawing_sequence_body(points, options, binary, should_stop=None):
+    start = time.perf_counter()
+    triang = tri.Triangulation(points, metrics=METRICS, **options)
+    records = triang.incremental_delaunay(should_stop=should_stop)
+    triangulated = time.perf_counter()
+    if binary:
+        # The wire encoding converts and serializes in one pass
+        body = wire.encode_sequence(records)
+        converted = triangulated
+    else:
+        steps = [triang.convert_record(i) for i in records]
+        converted = time.perf_counter()
+        body = json_body(steps)
+    done = time.perf_counter()
+    return body, job_metrics(triang, triangulate=triangulated - start, convert=converted - triangulated,
+                             serialize=done - converted)
+
+
+def drawing_sequence_lines(points, options, should_stop=None):
+    """Yields the drawing sequence as newline-delimited JSON while it is computed."""
+    start = time.perf_counter()
+    triang = tri.Triangulation(points, metrics=METRICS, **options)
+    for step in triang.iter_delaunay(should_stop):
+        yield (json.dumps(triang.convert_record(step)) + "\n").encode()
+    # Triangulating, converting and writing are interleaved, so they are timed together
+    metrics = job_metrics(triang, stream=time.perf_counter() - start)
+    if metrics is not None:
+        yield metrics
+
+
+def triangulation_body(points, options, should_stop=None):
+    start = time.perf_counter()
+    triang = tri.Triangulation(points, record=False, metrics=METRICS, **options)
+    triang.incremental_delaunay(should_stop=should_stop)
+    triangulated = time.perf_counter()
+    body = json_body({"triangles": triang.get_triangles(), "edges": triang.get_edges()})
+    return body, job_metrics(triang, triangulate=triangulated - start, serialize=time.perf_counter() - triangulated)
+
+
+def query_body(points, queries, options, voronoi, should_stop=None):
+    start = time.perf_counter()
+    triang = tri.Triangulation(points, record=False, metrics=METRICS, **options)
+    triang.incremental_delaunay(should_stop=should_stop)
+    triangulated = time.perf_counter()
+    result = query.answer(triang, queries, voronoi)
+    answered = time.perf_counter()
+    body = json_body(result)
+    return body, job_metrics(triang, triangulate=triangulated - start, query=answered - triangulated,
+                             serialize=time.perf_counter() - answered)
+
+
+def stop_check(deadline, cancel=None, interval=256):
+    """Returns a should_stop callback that stops once time.time() passes deadline or
+    cancel is set. cancel lives in a manager process, so it is only polled every
+    interval insertions."""
+    calls = 0
+
+    def should_stop():
+        nonlocal calls
+        calls += 1
+        if time.time() > deadline:
+            return True
+        return cancel is not None and calls % interval == 0 and cancel.is_set()
+    return should_stop
+
+
+def stopped_error(deadline):
+    if time.time() > deadline:
+        return JobTimeout()
+    return JobCancelled()
+
+
+def run_inline(job, args, timeout):
+    deadline = time.time() + timeout
+    try:
+        return job(*args, should_stop=stop_check(deadline))
+    except tri.TriangulationCancelled:
+        raise stopped_error(deadline) from None
+
+
+def stream_inline(job, args, timeout):
+    deadline = time.time() + timeout
+    try:
+        yield from job(*args, should_stop=stop_check(deadline))
+    except tri.TriangulationCancelled:
+        raise stopped_error(deadline) from None
+
+
+# Entry points executed in the worker processes
+def run_job(job, args, cancel, deadline):
+    try:
+        return job(*args, should_stop=stop_check(deadline, cancel))
+    except tri.TriangulationCancelled:
+        raise stopped_error(deadline) from None
+
+
+def stream_job(job, args, chunks, cancel, deadline, chunk_bytes=64 * 1024, flush_interval=0.1):
+    """Puts the output of job into the chunks queue in batches of up to chunk_bytes or
+    flush_interval seconds, followed by None. The queue is bounded, so a slow client
+    slows the job down. Anything the job yields that is not bytes, like its metrics, is
+    passed through on its own."""
+    def put(chunk):
+        while True:
+            try:
+                chunks.put(chunk, timeout=1)
+                return
+            except queue.Full:
+                if cancel.is_set() or time.time() > deadline:
+                    raise stopped_error(deadline) from None
+
+    batch = []
+    size = 0
+    flushed = time.time()
+    try:
+        for line in job(*args, should_stop=stop_check(deadline, cancel)):
+            if not isinstance(line, bytes):
+                if batch:
+                    put(b"".join(batch))
+                    batch = []
+                    size = 0
+                put(line)
+                continue
+            batch.append(line)
+            size += len(line)
+            if size >= chunk_bytes or time.time() - flushed > flush_interval:
+                put(b"".join(batch))
+                batch = []
+                size = 0
+                flushed = time.time()
+    except tri.TriangulationCancelled:
+        raise stopped_error(deadline) from None
+    if batch:
+        put(b"".join(batch))
+    put(None)
+
+
+class TriangulationPool:
+    """Process pool with workers running slots plus max_queued waiting slots. Jobs that
+    do not fit are rejected with PoolSaturated instead of piling up."""
+    def __init__(self, workers, max_queued=None, timeout=60):
+        self.workers = workers
+        self.max_queued = workers * 2 if max_queued is None else max_queued
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(workers + self.max_queued)
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        # Cancel events and stream queues have to be shared with the worker processes
+        self.manager = multiprocessing.Manager()
+        self.lock = threading.Lock()
+        self.active = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.cancelled = 0
+        self.failed = 0
+
+    def submit(self, func, *args):
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            raise PoolSaturated()
+        cancel = self.manager.Event()
+        deadline = time.time() + self.timeout
+        try:
+            future = self.executor.submit(func, *args, cancel, deadline)
+        except BaseException:
+            self.slots.release()
+            raise
+        with self.lock:
+            self.active += 1
+            self.submitted += 1
+        future.add_done_callback(self.finished)
+        return future, cancel
+
+    def finished(self, future):
+        """Frees the slot once the worker is really done with the job."""
+        with self.lock:
+            self.active -= 1
+            if future.cancelled():
+                self.cancelled += 1
+            elif isinstance(future.exception(), JobTimeout):
+                self.timed_out += 1
+            elif isinstance(future.exception(), JobCancelled):
+                self.cancelled += 1
+            elif future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+        self.slots.release()
+
+    def run(self, job, *args):
+        """Runs job(*args) in a worker and returns its result."""
+        future, cancel = self.submit(run_job, job, args)
+        try:
+            # The worker stops itself at the deadline; the extra second covers the transfer
+            return future.result(timeout=self.timeout + 1)
+        except FutureTimeout:
+            cancel.set()
+            future.cancel()
+            raise JobTimeout() from None
+
+    def stream(self, job, *args):
+        """Runs the generator job(*args) in a worker and returns an iterator over its
+        output. Slots are taken immediately, so PoolSaturated is raised here and not
+        while iterating. Closing the iterator early, which the WSGI server does when the
+        client disconnects, cancels the job."""
+        chunks = self.manager.Queue(maxsize=16)
+        future, cancel = self.submit(stream_job, job, args, chunks)
+        return self.read_stream(future, cancel, chunks)
+
+    def read_stream(self, future, cancel, chunks):
+        try:
+            while True:
+                try:
+                    chunk = chunks.get(timeout=1)
+                except queue.Empty:
+                    # A job that failed or hit its deadline ends without the None marker
+                    if future.done():
+                        future.result()
+                        return
+                    continue
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            if not future.done():
+                cancel.set()
+                future.cancel()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "workers": self.workers,
+                "max_queued": self.max_queued,
+                "active": self.active,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "cancelled": self.cancelled,
+                "failed": self.failed,
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(cancel_futures=True)
+        self.manager.shutdown()